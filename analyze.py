@@ -0,0 +1,119 @@
+"""Headless topic analysis — the upload pipeline without the browser.
+
+    python analyze.py reviews.csv --text-col Text --topics 12 --jobs -1 --out analysis/
+    python analyze.py new_reviews.csv --out analysis/ --update     # assign to the saved topics
+
+Writes Parquet artifacts (served by the app's demo loaders) and/or the notebook-style
+CSVs, plus the fitted TopicModel so later drops can be assigned without a refit.
+A fresh run will not replace an existing analysis (such as the bundled demo in data/)
+unless --force is given.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from ann import ANN_DIR
+from artifacts import REVIEW_COLUMNS, build_artifacts, has_artifacts, read_reviews, review_columns
+from cache import ResultCache, file_digest
+from pipeline import (
+    CLUSTER_ENGINES,
+    SUMMARY_MODES,
+    VECTORIZERS,
+    TopicModel,
+    detect_score_col,
+    iter_chunks,
+    read_preview,
+    run_analysis,
+)
+
+MODEL_FILE   = "topic_model.pkl"
+REVIEWS_CSV  = "reviews_with_topics.csv"
+SUMMARY_CSV  = "topic_summaries.csv"
+FORMATS      = ("parquet", "csv", "both")
+BASE_COLUMNS = ["topic_id", "topic_name", "summary"]
+
+
+def write_outputs(out_dir: Path, reviews: pd.DataFrame, summaries: pd.DataFrame, fmt: str):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if fmt in ("parquet", "both"):
+        build_artifacts(reviews, summaries[BASE_COLUMNS], out_dir)
+    if fmt in ("csv", "both"):
+        reviews.to_csv(out_dir / REVIEWS_CSV, index=False)
+        summaries[BASE_COLUMNS].to_csv(out_dir / SUMMARY_CSV, index=False)
+
+
+def read_existing(out_dir: Path) -> pd.DataFrame:
+    """Reviews already served from out_dir (Parquet artifacts, else the CSV)."""
+    if has_artifacts(out_dir):
+        return read_reviews(out_dir).reset_index(drop=True)
+    return pd.read_csv(out_dir / REVIEWS_CSV)[REVIEW_COLUMNS]
+
+
+def has_outputs(out_dir: Path) -> bool:
+    """Whether out_dir already holds an analysis a fresh run would overwrite."""
+    return has_artifacts(out_dir) or any((out_dir / name).exists() for name in (MODEL_FILE, SUMMARY_CSV))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", help="input CSV (streamed in chunks)")
+    parser.add_argument("--text-col", default="Text")
+    parser.add_argument("--score-col", help="star rating column (default: detected from the header)")
+    parser.add_argument("--topics", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=-1, help="worker processes (-1 = all cores)")
+    parser.add_argument("--engine", choices=list(CLUSTER_ENGINES), default="auto")
+    parser.add_argument("--vectorizer", choices=list(VECTORIZERS), default="auto")
+    parser.add_argument("--summary", choices=list(SUMMARY_MODES), default="auto")
+    parser.add_argument("--out", default="analysis", help="output directory")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--update", action="store_true",
+                        help="assign the CSV to the topics saved in --out instead of refitting")
+    parser.add_argument("--force", action="store_true", help="overwrite an existing analysis in --out")
+    parser.add_argument("--no-cache", action="store_true", help="skip the on-disk stage cache")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    out_dir = Path(args.out)
+    if not args.update and not args.force and has_outputs(out_dir):
+        parser.error(f"{out_dir}/ already holds an analysis — pass --force to replace it, or --update to add to it")
+    columns = read_preview(args.csv).columns
+    if args.text_col not in columns:
+        parser.error(f"column {args.text_col!r} not in {args.csv} (columns: {', '.join(columns)})")
+    score_col = args.score_col or detect_score_col(columns)
+    chunks    = iter_chunks(args.csv, args.text_col, score_col)
+    start     = time.perf_counter()
+
+    if args.update:
+        model_path = out_dir / MODEL_FILE
+        if not model_path.exists():
+            parser.error(f"--update needs a previous run's {model_path}")
+        model = TopicModel.load(model_path)
+        summaries, new_reviews = model.assign(chunks, args.text_col, n_jobs=args.jobs, score_col=score_col)
+        reviews = pd.concat([read_existing(out_dir), review_columns(new_reviews)], ignore_index=True)
+        n_new   = len(new_reviews)
+    else:
+        summaries, reviews, model = run_analysis(
+            chunks, args.text_col, args.topics,
+            engine=args.engine, vectorizer=args.vectorizer, summary=args.summary, n_jobs=args.jobs,
+            cache=None if args.no_cache else ResultCache(),
+            data_key=file_digest(args.csv), score_col=score_col, return_model=True,
+        )
+        reviews = review_columns(reviews)
+        n_new   = len(reviews)
+
+    write_outputs(out_dir, reviews, summaries, args.format)
+    model.save(out_dir / MODEL_FILE)
+    print(f"{n_new:,} reviews {'assigned to' if args.update else 'grouped into'} {len(summaries)} topics "
+          f"in {time.perf_counter() - start:.1f}s → {out_dir}/")
+    if (out_dir / ANN_DIR).is_dir():
+        print(f"Row ids changed — rebuild the semantic index: python ann.py {out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
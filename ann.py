@@ -0,0 +1,141 @@
+"""Approximate nearest-neighbour search over review embeddings.
+
+    python ann.py data/        # embed the demo reviews and write data/ann/
+"""
+
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from pipeline import clean_text, clean_texts
+
+ANN_DIR      = "ann"
+N_PROBE      = 8          # inverted lists scanned per query
+TRAIN_ROWS   = 100_000    # sample used to fit the coarse quantizer
+ASSIGN_BATCH = 50_000
+
+
+class IVFIndex:
+    """Inverted-file index (IVF-Flat, float16) for L2-normalised vectors.
+
+    A k-means coarse quantizer splits the corpus into ~2·sqrt(n) lists; vectors are
+    stored grouped by list, so a query scores the centroids, then scans only the n_probe
+    closest lists — a few thousand rows even on the full 568k corpus. Saved as plain
+    .npy files and memory-mapped on load. ids are the caller's row ids for each vector.
+    """
+
+    def __init__(self, centroids, vectors, ids, offsets):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.vectors   = vectors
+        self.ids       = ids
+        self.offsets   = offsets
+        self._position = None
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, ids=None, n_lists: Optional[int] = None, seed: int = 42):
+        from sklearn.cluster import MiniBatchKMeans
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n       = len(vectors)
+        ids     = np.arange(n, dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+        n_lists = min(n_lists or int(min(4096, max(1, 2 * np.sqrt(n)))), n)   # k-means needs n_lists <= n
+        if n == 0:
+            empty = np.zeros((0, vectors.shape[1] if vectors.ndim == 2 else 0), dtype=np.float32)
+            return cls(empty, empty.astype(np.float16), ids, np.zeros(1, dtype=np.int64))
+
+        rng    = np.random.default_rng(seed)
+        sample = vectors[rng.choice(n, size=min(n, max(TRAIN_ROWS, n_lists)), replace=False)]
+        km     = MiniBatchKMeans(n_clusters=n_lists, random_state=seed, n_init="auto", batch_size=4096)
+        km.fit(sample)
+
+        lists = np.concatenate([
+            km.predict(vectors[start:start + ASSIGN_BATCH]) for start in range(0, n, ASSIGN_BATCH)
+        ])
+        order   = np.argsort(lists, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(lists, minlength=n_lists), out=offsets[1:])
+        return cls(km.cluster_centers_, vectors[order].astype(np.float16), ids[order], offsets)
+
+    def save(self, root):
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        for name in ("centroids", "vectors", "ids", "offsets"):
+            np.save(root / f"{name}.npy", np.asarray(getattr(self, name)))
+
+    @classmethod
+    def load(cls, root):
+        root = Path(root)
+        return cls(*(np.load(root / f"{name}.npy", mmap_mode="r") for name in ("centroids", "vectors", "ids", "offsets")))
+
+    def vector(self, row_id: int) -> Optional[np.ndarray]:
+        """Stored vector for a row id (None if the row is not indexed)."""
+        if self._position is None:
+            self._position = {int(r): i for i, r in enumerate(self.ids)}
+        pos = self._position.get(int(row_id))
+        return None if pos is None else np.asarray(self.vectors[pos], dtype=np.float32)
+
+    def search(self, query: np.ndarray, k: int = 10, n_probe: int = N_PROBE):
+        """(row ids, cosine scores) of the approximate k nearest vectors, best first."""
+        query  = np.asarray(query, dtype=np.float32).ravel()
+        probes = np.argsort(self.centroids @ query)[::-1][:n_probe]
+
+        spans  = [(self.offsets[p], self.offsets[p + 1]) for p in probes]
+        rows   = np.concatenate([np.arange(a, b) for a, b in spans]) if spans else np.array([], int)
+        if len(rows) == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        cand   = np.concatenate([np.asarray(self.vectors[a:b], dtype=np.float32) for a, b in spans])
+        scores = cand @ query
+        top    = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top    = top[np.argsort(-scores[top])]
+        return np.asarray(self.ids[rows[top]]), scores[top]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class SemanticSearch:
+    """'More like this' and free-text search on top of an IVFIndex and an embedding engine.
+
+    The embedder holds a loaded model and belongs to one process, so it is not pickled:
+    whoever loads a SemanticSearch attaches their own before calling query().
+    """
+
+    def __init__(self, index: IVFIndex, embedder=None):
+        self.index    = index
+        self.embedder = embedder
+
+    def __getstate__(self):
+        return {**self.__dict__, "embedder": None}
+
+    def similar(self, row_id: int, k: int = 15) -> np.ndarray:
+        vec = self.index.vector(row_id)
+        if vec is None:
+            return np.array([], dtype=np.int64)
+        ids, _ = self.index.search(vec, k + 1)
+        return ids[ids != row_id][:k]
+
+    def query(self, text: str, k: int = 15) -> np.ndarray:
+        vec = self.embedder.embed([clean_text(text)])[0]
+        ids, _ = self.index.search(vec, k)
+        return ids
+
+
+def build_demo_index(data_dir, embedder=None) -> Path:
+    """Embed the demo reviews (topic-sorted Parquet artifacts) and write data_dir/ann/."""
+    from artifacts import read_reviews
+
+    if embedder is None:
+        from embeddings import EmbeddingEngine
+        embedder = EmbeddingEngine()
+
+    reviews = read_reviews(data_dir, columns=["Text"])
+    vectors = embedder.encode(clean_texts(reviews["Text"].fillna("").astype(str).tolist()))
+    out     = Path(data_dir) / ANN_DIR
+    IVFIndex.build(vectors, ids=reviews.index.to_numpy()).save(out)
+    return out
+
+
+if __name__ == "__main__":
+    print(f"Wrote {build_demo_index(sys.argv[1] if len(sys.argv) > 1 else 'data')}")
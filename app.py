@@ -1,8 +1,36 @@
-import re
+import copy
+import html
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
 import streamlit as st
 import pandas as pd
 
+from ann import ANN_DIR, IVFIndex, SemanticSearch
+from artifacts import has_artifacts, read_rows, read_summaries, read_topic_reviews
+from cache import ResultCache, file_digest
+from embeddings import EmbeddingEngine
+from jobs import JobQueue
+from pipeline import (
+    CLUSTER_ENGINES,
+    SUMMARY_MODES,
+    VECTORIZERS,
+    clean_texts,
+    PREVIEW_ROWS,
+    STAGES,
+    detect_score_col,
+    iter_chunks,
+    keywords,
+    read_preview,
+    text_columns,
+    with_topic_view,
+)
+from search import ReviewIndex
+from store import AnalysisStore, TopicStore, build_analysis, with_display_columns
+from summarize import BartSummarizer, summarize_topics
+
 # ── Page config ────────────────────────────────────────────────────────────────
 st.set_page_config(
     page_title="Review Intelligence",
@@ -308,16 +336,26 @@ html { scrollbar-color: #8B1A1A #080808; }
 }
 .rev-card {
     background: #0e0e0e;
-    border: 1px solid #161616;
+    border: 1px solid #1a1a1a;
     border-radius: 10px;
-    padding: 1rem 1.2rem;
-    margin-bottom: 0.6rem;
+    margin-bottom: 0.4rem;
+    overflow: hidden;
     transition: border-color 0.18s, box-shadow 0.18s;
 }
 .rev-card:hover {
-    border-color: #2a1a1a;
-    box-shadow: 0 0 20px rgba(139,26,26,0.15);
+    border-color: #8B1A1A;
+    box-shadow: 0 0 12px rgba(139,26,26,0.2);
+}
+.rev-card summary {
+    color: #d0ccc4;
+    font-size: 0.8rem;
+    padding: 0.8rem 1.2rem;
+    cursor: pointer;
+    list-style: none;
 }
+.rev-card summary::-webkit-details-marker { display: none; }
+.rev-card summary:hover { color: #f0ece4; }
+.rev-card[open] summary { border-bottom: 1px solid #1a1a1a; }
 .rev-head {
     display: flex;
     justify-content: space-between;
@@ -340,10 +378,11 @@ html { scrollbar-color: #8B1A1A #080808; }
     letter-spacing: 1px;
 }
 .rev-body {
-    font-size: 0.77rem;
+    font-size: 0.82rem;
     color: #aaaaaa;
-    line-height: 1.7;
+    line-height: 1.8;
     font-weight: 300;
+    padding: 0.8rem 1.2rem;
 }
 .scroll-box {
     max-height: 580px;
@@ -644,6 +683,14 @@ html { scrollbar-color: #8B1A1A #080808; }
     border-top: 1px solid #1a1a1a !important;
     padding: 0 1.2rem 0.6rem 1.2rem !important;
 }
+.pager-label {
+    font-size: 0.7rem;
+    color: #555;
+    text-align: center;
+    padding-top: 0.5rem;
+    letter-spacing: 0.08em;
+}
+
 /* Legacy class names */
 .streamlit-expanderHeader {
     background: #0e0e0e !important;
@@ -848,14 +895,6 @@ def stars(score: float) -> str:
     return "★" * n + "☆" * (5 - n)
 
 
-EXCLUDE = {"br", "the", "and", "for", "this", "that", "with", "from", "its", "was", "are", "have"}
-
-def keywords(topic_name: str) -> list:
-    """All non-numeric, non-artifact words from an underscore-delimited topic label."""
-    parts = str(topic_name).split("_")
-    return [p for p in parts if not p.isdigit() and len(p) > 1 and p.lower() not in EXCLUDE]
-
-
 def topic_title(topic_name: str) -> str:
     """All non-numeric words from topic_name, capitalized. Used for BOTH pill labels and insight title."""
     kws = keywords(topic_name)
@@ -867,17 +906,16 @@ def display_name(topic_name: str, n: int = 99) -> str:
     return topic_title(topic_name)
 
 
-def strip_html(text: str) -> str:
-    """Remove HTML tags and bare URLs from review text."""
-    text = re.sub(r"<.*?>", "", str(text))
-    text = re.sub(r"http\S+", "", text)
-    return text.strip()
-
-
 def fmt(n: int) -> str:
     return f"{n:,}"
 
 
+def install_hint(module: str) -> str:
+    """pip package name for a missing module."""
+    module = module or ""
+    return "scikit-learn" if module.startswith("sklearn") else module.replace("_", "-")
+
+
 def go_to(mode: str):
     """Change mode, sync URL query param, and rerun."""
     st.session_state.mode   = mode
@@ -885,13 +923,10 @@ def go_to(mode: str):
     st.rerun()
 
 
-def clean_text(t: str) -> str:
-    t = str(t).lower().strip()
-    t = re.sub(r"[^a-z\s]", " ", t)
-    return re.sub(r"\s+", " ", t).strip()
+# ── DATA ──────────────────────────────────────────────────────────────────────
 
+DATA_DIR = "data"
 
-# ── DATA ──────────────────────────────────────────────────────────────────────
 
 @st.cache_data
 def load_demo_data():
@@ -900,72 +935,86 @@ def load_demo_data():
     summaries.columns = summaries.columns.str.strip()
     reviews.columns   = reviews.columns.str.strip()
     reviews["Score"]  = pd.to_numeric(reviews["Score"], errors="coerce")
-    clean = reviews[reviews["topic"] != -1].copy()
-    stats = (
-        clean.groupby("topic")
-        .agg(review_count=("Score", "count"), avg_score=("Score", "mean"))
-        .reset_index()
-    )
-    summaries = summaries[summaries["topic_id"] != -1].copy()
-    summaries = summaries.merge(stats, left_on="topic_id", right_on="topic", how="left")
-    summaries["review_count"] = summaries["review_count"].fillna(0).astype(int)
-    summaries["avg_score"]    = summaries["avg_score"].fillna(3.0)
+    clean = with_display_columns(reviews[reviews["topic"] != -1])
+    summaries = summaries[summaries["topic_id"] != -1]
+    summaries = with_topic_view(summaries, clean["topic"], clean["Score"])
     return summaries, clean
 
 
-def run_analysis(df: pd.DataFrame, text_col: str, n_topics: int):
-    """TF-IDF + KMeans topic discovery. Returns (summaries_df, reviews_df)."""
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.cluster import KMeans
+@st.cache_data
+def load_demo_summaries():
+    """Demo topic summaries + stats — from the Parquet artifacts when built, else the CSVs."""
+    if has_artifacts(DATA_DIR):
+        return read_summaries(DATA_DIR)
+    return load_demo_data()[0]
 
-    texts   = df[text_col].fillna("").astype(str).tolist()
-    cleaned = [clean_text(t) for t in texts]
 
-    n_clusters = min(n_topics, max(2, len(df) // 10))
+@st.cache_resource
+def load_demo_store():
+    """CSV fallback: all demo reviews partitioned by topic once per server process."""
+    _, reviews = load_demo_data()
+    return TopicStore(reviews)
 
-    vec = TfidfVectorizer(max_features=2000, stop_words="english", min_df=2, max_df=0.95)
-    X   = vec.fit_transform(cleaned)
 
-    km     = KMeans(n_clusters=n_clusters, random_state=42, n_init="auto")
-    labels = km.fit_predict(X)
+@st.cache_resource
+def load_demo_topic(topic: int):
+    """One topic's demo reviews — a single memory-mapped row group when artifacts exist."""
+    if has_artifacts(DATA_DIR):
+        return with_display_columns(read_topic_reviews(DATA_DIR, topic))
+    return load_demo_store().topic(topic)
 
-    df       = df.copy()
-    df["topic"] = labels
 
-    terms     = vec.get_feature_names_out()
-    centroids = km.cluster_centers_.argsort()[:, ::-1]
+@st.cache_resource
+def load_demo_index(topic: int):
+    """Inverted search index over one demo topic — built once per server process."""
+    return ReviewIndex(load_demo_topic(topic), text_col="body")
 
-    rows = []
-    for i in range(n_clusters):
-        top_kws    = [terms[j] for j in centroids[i, :5]]
-        topic_name = f"{i}_" + "_".join(top_kws[:4])
-        cluster_texts = [texts[j] for j, lbl in enumerate(labels) if lbl == i][:4]
-        summary = " ".join(cluster_texts)
-        if len(summary) > 600:
-            summary = summary[:600] + "…"
-        rows.append({"topic_id": i, "topic_name": topic_name, "summary": summary})
 
-    sum_df = pd.DataFrame(rows)
+@st.cache_resource
+def load_demo_semantic():
+    """ANN index over the demo review embeddings, if `python ann.py data/` has been run."""
+    if not (has_artifacts(DATA_DIR) and (Path(DATA_DIR) / ANN_DIR).is_dir()):
+        return None
+    return SemanticSearch(IVFIndex.load(Path(DATA_DIR) / ANN_DIR), embedding_engine())
+
+
+@st.cache_resource
+def embedding_engine():
+    """Sentence encoder + vector store shared by every session (model loads on first use)."""
+    return EmbeddingEngine()
+
+
+@st.cache_resource
+def bart_summarizer():
+    """BART summarizer + summary cache shared by every session.
+
+    The model loads on first use in one spawned worker, never in the server process.
+    """
+    return BartSummarizer(isolate=True)
 
-    # Detect score column
-    score_col = next(
-        (c for c in df.columns if c.lower() in {"score", "rating", "stars", "rating_score"}),
-        None,
-    )
-    df["Score"] = pd.to_numeric(df[score_col], errors="coerce").fillna(3.0) if score_col else 3.0
-    df["Summary"] = df[text_col].str[:80]
-    df["Text"]    = df[text_col]
-
-    stats = (
-        df.groupby("topic")
-        .agg(review_count=("Score", "count"), avg_score=("Score", "mean"))
-        .reset_index()
-    )
-    sum_df = sum_df.merge(stats, left_on="topic_id", right_on="topic", how="left")
-    sum_df["review_count"] = sum_df["review_count"].fillna(0).astype(int)
-    sum_df["avg_score"]    = sum_df["avg_score"].fillna(3.0)
 
-    return sum_df, df
+@st.cache_resource
+def job_queue():
+    """Worker process pool running uploads' analyses off the script thread."""
+    return JobQueue()
+
+
+@st.cache_resource
+def analysis_store():
+    """Upload analyses shared by every session, keyed by upload fingerprint."""
+    return AnalysisStore(attach_embedder)
+
+
+def attach_embedder(analysis):
+    """Give a loaded analysis's semantic search this process's embedding engine."""
+    if analysis.semantic is not None:
+        analysis.semantic.embedder = embedding_engine()
+
+
+@st.cache_resource
+def summary_executor():
+    """One background thread for summary jobs, so a script rerun never waits on BART."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="summaries")
 
 
 # ── SESSION STATE ─────────────────────────────────────────────────────────────
@@ -975,11 +1024,10 @@ def init_state():
         "mode":            "landing",
         "selected":        None,
         "upload_done":     False,
-        "upload_summaries": None,
-        "upload_reviews":   None,
+        "upload_analysis":  None,     # AnalysisHandle — the data lives in analysis_store()
+        "upload_summary_job": None,
+        "upload_timings":   None,
         "upload_selected":  None,
-        "upload_n_reviews": 0,
-        "upload_n_topics":  0,
     }
     for k, v in defaults.items():
         if k not in st.session_state:
@@ -1019,6 +1067,8 @@ def render_back_button(dest: str = "landing", key: str = "back"):
     col, _ = st.columns([1, 11])
     with col:
         if st.button("← Back", key=key, type="secondary"):
+            # Leaving the upload flow: a stale ?job= would reopen the old analysis
+            st.query_params.pop("job", None)
             go_to(dest)
 
 
@@ -1036,12 +1086,44 @@ def render_pills(summaries_df: pd.DataFrame, selected_key: str, key_prefix: str
             with cols[i]:
                 if st.button(pname, key=f"pill_{key_prefix}_{tid}", type=ptype, use_container_width=True):
                     st.session_state[selected_key] = tid
+                    st.session_state.pop(f"similar_{selected_key}", None)
                     st.rerun()
         st.markdown('<div class="pill-row-gap"></div>', unsafe_allow_html=True)
 
 
-def render_dashboard(summaries_df, reviews_df, hero_reviews, hero_topics, hero_summaries, selected_key):
-    """Shared dashboard panel (used by both demo and upload modes)."""
+PAGE_SIZE = 15    # review cards per page
+
+
+def review_cards_html(reviews: pd.DataFrame) -> str:
+    """One page of reviews as a single HTML block, joined from the precomputed display columns.
+
+    Title and body are escaped here: stripping tags leaves stray "<" and "&" behind.
+    """
+    cards = "".join(
+        f'<details class="rev-card"><summary>{s}&nbsp;&nbsp;{html.escape(t)}</summary>'
+        f'<div class="rev-body">{html.escape(b)}</div></details>'
+        for s, t, b in zip(reviews["stars"], reviews["title"], reviews["body"])
+    )
+    return f'<div class="rev-list">{cards}</div>'
+
+
+def _turn_page(page_key: str, page: int):
+    st.session_state[page_key] = page
+
+
+def _more_like_this(pick_key: str, similar_key: str):
+    st.session_state[similar_key] = int(st.session_state[pick_key])
+    st.session_state[pick_key]    = None
+
+
+def render_dashboard(summaries_df, topic_reviews, hero_reviews, hero_topics, hero_summaries, selected_key,
+                     search_index=None, semantic=None, fetch_rows=None):
+    """Shared dashboard panel (used by both demo and upload modes).
+
+    topic_reviews holds only the selected topic's reviews (see TopicStore.topic), indexed
+    by row id. With a SemanticSearch and a fetch_rows(row_ids) callable, the panel also
+    offers meaning-based search and "more like this" across the whole dataset.
+    """
 
     st.markdown(f"""
     <div class="metrics-grid">
@@ -1072,37 +1154,80 @@ def render_dashboard(summaries_df, reviews_df, hero_reviews, hero_topics, hero_s
     sel_summary = str(sel["summary"]) if pd.notna(sel["summary"]) else "No summary available."
     sel_avg     = float(sel["avg_score"])
     sel_count   = int(sel["review_count"])
-    sel_kws     = keywords(sel_name)          # every non-numeric word
+    sel_kws     = list(sel["keywords"]) if "keywords" in sel else keywords(sel_name)
     sel_title   = topic_title(sel_name)       # same words, capitalized
     sel_stars   = stars(sel_avg)
 
-    topic_reviews = reviews_df[reviews_df["topic"] == st.session_state[selected_key]]
-
     # Review search input — filters right-side cards, never affects topic pills
-    search_col, _ = st.columns([3, 7])
+    search_col, toggle_col, _ = st.columns([3, 1.2, 5.8])
     with search_col:
         query = st.text_input(
             "rev_search", placeholder="🔍  Search within reviews…",
             label_visibility="collapsed",
             key=f"rev_search_{selected_key}",
         )
+    semantic_on = False
+    if semantic is not None:
+        with toggle_col:
+            semantic_on = st.toggle(
+                "Semantic", key=f"semantic_{selected_key}",
+                help="Search by meaning across all reviews instead of by keyword in this topic",
+            )
 
+    similar_key  = f"similar_{selected_key}"
+    similar_to   = st.session_state.get(similar_key) if semantic is not None else None
     search_query = query.strip()
-    if search_query:
-        filtered_reviews = topic_reviews[
-            topic_reviews["Text"].str.contains(search_query, case=False, na=False)
-        ]
-        sample        = filtered_reviews.head(15)
+    semantic_view = None
+
+    # Every view reduces to (match count, take(slice) → that page of reviews)
+    if similar_to is not None:
+        semantic_view = "Similar Reviews"
+        matches       = fetch_rows(semantic.similar(similar_to))
+        take          = matches.iloc.__getitem__
+        search_active = True
+        search_count  = len(matches)
+    elif search_query and semantic_on:
+        semantic_view = "Semantic Matches"
+        matches       = fetch_rows(semantic.query(search_query))
+        take          = matches.iloc.__getitem__
+        search_active = True
+        search_count  = len(matches)
+    elif search_query:
+        if search_index is not None:
+            hits = search_index.search(st.session_state[selected_key], search_query)
+        else:
+            hits = np.flatnonzero(
+                topic_reviews["body"].str.contains(search_query, case=False, na=False, regex=False).to_numpy()
+            )
+        take          = lambda page: topic_reviews.iloc[hits[page]]
         search_active = True
-        search_count  = len(filtered_reviews)
+        search_count  = len(hits)
+    elif "sample_rows" in sel:
+        # Fixed sample precomputed with the topic view — no resampling per rerun
+        rows          = list(sel["sample_rows"]) if len(topic_reviews) > 0 else []
+        take          = lambda page: topic_reviews.iloc[rows[page]]
+        search_active = False
+        search_count  = len(topic_reviews)
     else:
         sample = (
-            topic_reviews.sample(min(15, len(topic_reviews)), random_state=42)
-            if len(topic_reviews) > 0 else pd.DataFrame()
+            topic_reviews.sample(min(PAGE_SIZE, len(topic_reviews)), random_state=42)
+            if len(topic_reviews) > 0 else topic_reviews
         )
+        take          = sample.iloc.__getitem__
         search_active = False
         search_count  = len(topic_reviews)
 
+    # Paging only applies to search results; the sample view is a single page
+    n_items  = search_count if search_active else min(search_count, PAGE_SIZE)
+    n_pages  = max(1, -(-n_items // PAGE_SIZE))
+    page_key = f"page_{selected_key}"
+    view_sig = (st.session_state[selected_key], search_query, semantic_on, similar_to)
+    if st.session_state.get(f"{page_key}_view") != view_sig:
+        st.session_state[f"{page_key}_view"] = view_sig
+        st.session_state[page_key] = 0
+    page   = min(st.session_state[page_key], n_pages - 1)
+    sample = take(slice(page * PAGE_SIZE, (page + 1) * PAGE_SIZE))
+
     left_col, right_col = st.columns([4, 6], gap="large")
 
     with left_col:
@@ -1126,33 +1251,49 @@ def render_dashboard(summaries_df, reviews_df, hero_reviews, hero_topics, hero_s
         """, unsafe_allow_html=True)
 
     with right_col:
-        eyebrow_label = "Search Results" if search_active else "Sample Reviews"
+        eyebrow_label = semantic_view or ("Search Results" if search_active else "Sample Reviews")
         eyebrow_suffix = "matched" if search_active else "total"
         st.markdown(
             f'<div class="reviews-eyebrow">{eyebrow_label} &nbsp;·&nbsp; {fmt(search_count)} {eyebrow_suffix}</div>',
             unsafe_allow_html=True,
         )
+        if similar_to is not None:
+            if st.button("✕ Back to topic", key=f"clear_{similar_key}", type="secondary"):
+                st.session_state.pop(similar_key, None)
+                st.rerun()
         if sample.empty:
             empty_msg = (
-                f'No reviews found containing "{search_query}"'
+                "No similar reviews found."
+                if semantic_view
+                else f'No reviews found containing "{search_query}"'
                 if search_active
                 else "No reviews for this topic."
             )
             st.markdown(f'<div style="color:#555;font-size:0.85rem;padding:2rem 0">{empty_msg}</div>', unsafe_allow_html=True)
         else:
-            for idx, (_, rev) in enumerate(sample.iterrows()):
-                score     = float(rev["Score"]) if pd.notna(rev.get("Score")) else 3.0
-                title_txt = strip_html(rev.get("Summary", "") or "—") or "—"
-                body_txt  = strip_html(rev.get("Text", ""))
-                star_str  = stars(score)
-
-                with st.expander(f"{star_str}  {title_txt}"):
-                    st.markdown(f"""
-                    <div style="font-size:0.82rem;color:#aaa;line-height:1.8;font-weight:300;
-                                padding:0.5rem 0;">
-                        {body_txt}
-                    </div>
-                    """, unsafe_allow_html=True)
+            st.markdown(review_cards_html(sample), unsafe_allow_html=True)
+
+            if n_pages > 1:
+                prev_col, label_col, next_col = st.columns([1, 2, 1])
+                with prev_col:
+                    st.button("← Prev", key=f"prev_{page_key}", type="secondary", disabled=page == 0,
+                              on_click=_turn_page, args=(page_key, page - 1))
+                with label_col:
+                    st.markdown(f'<div class="pager-label">Page {page + 1:,} of {n_pages:,}</div>',
+                                unsafe_allow_html=True)
+                with next_col:
+                    st.button("Next →", key=f"next_{page_key}", type="secondary", disabled=page >= n_pages - 1,
+                              on_click=_turn_page, args=(page_key, page + 1))
+
+            if semantic is not None:
+                titles   = sample["title"]
+                pick_key = f"more_{selected_key}"
+                st.selectbox(
+                    "More like this", options=list(sample.index), index=None, key=pick_key,
+                    format_func=lambda rid: f"More like this: {titles.get(rid, rid) or rid}",
+                    placeholder="More like this…", label_visibility="collapsed",
+                    on_change=_more_like_this, args=(pick_key, similar_key),
+                )
 
 
 # ── PAGES ─────────────────────────────────────────────────────────────────────
@@ -1213,11 +1354,14 @@ def page_landing():
 
 
 def page_demo():
+    demo_summaries = load_demo_summaries()
+    n_reviews      = int(demo_summaries["review_count"].sum())
+
     # Gold demo banner — full bleed above everything
     st.markdown(
         '<div class="demo-banner">'
-        '📊 Demo Dataset: 568,454 Amazon Fine Food Reviews &nbsp;·&nbsp; Sampled 10,000 &nbsp;·&nbsp; '
-        'AI discovered 121 topics &nbsp;·&nbsp; 10 summaries generated'
+        f'📊 Demo Dataset: {n_reviews:,} Amazon Fine Food Reviews &nbsp;·&nbsp; '
+        f'{len(demo_summaries)} topics summarized'
         '</div>',
         unsafe_allow_html=True,
     )
@@ -1233,36 +1377,136 @@ def page_demo():
         if st.button("Try with your own data →", key="demo_to_upload", type="primary"):
             go_to("upload")
 
-    demo_summaries, demo_reviews = load_demo_data()
-
     if st.session_state.selected is None or st.session_state.selected not in demo_summaries["topic_id"].values:
         st.session_state.selected = int(demo_summaries["topic_id"].iloc[0])
 
     render_dashboard(
         summaries_df  = demo_summaries,
-        reviews_df    = demo_reviews,
-        hero_reviews  = 568_454,
-        hero_topics   = 121,
+        topic_reviews = load_demo_topic(st.session_state.selected),
+        hero_reviews  = n_reviews,
+        hero_topics   = len(demo_summaries),
         hero_summaries= len(demo_summaries),
         selected_key  = "selected",
+        search_index  = load_demo_index(st.session_state.selected),
+        semantic      = load_demo_semantic(),
+        fetch_rows    = lambda ids: with_display_columns(read_rows(DATA_DIR, ids)),
     )
     render_footer()
     st.stop()
 
 
+def upload_key(digest: str, *parts) -> str:
+    """Fingerprint of an upload — file contents plus everything that shapes its analysis."""
+    return ResultCache.key(digest, *parts)
+
+
+def render_add_reviews():
+    """Assign a new CSV drop to the existing topics — no refit."""
+    handle = st.session_state.upload_analysis
+    if handle is None:
+        return
+    model = handle.get().model
+    with st.expander("＋ Add new reviews to these topics"):
+        new_file = st.file_uploader(
+            "New reviews CSV", type=["csv"], key="add_reviews_file",
+            help=f"Needs the same '{model.text_col}' column. Reviews are assigned to the current topics.",
+        )
+        if new_file is None or not st.button("Assign to topics →", key="add_reviews_run", type="primary"):
+            return
+        columns = read_preview(new_file).columns
+        if model.text_col not in columns:
+            st.error(f"Column '{model.text_col}' not found in this CSV.")
+            return
+        key = upload_key(handle.key, file_digest(new_file))
+        new_handle = analysis_store().open(key)
+        if new_handle is None:
+            with st.spinner("Assigning reviews…"):
+                # assign() updates the model in place, and this one is shared by every
+                # session on the base analysis — the derived analysis gets its own copy
+                new_model = copy.deepcopy(model)
+                score_col = detect_score_col(columns)
+                chunks = iter_chunks(new_file, model.text_col, score_col)
+                sum_df, new_rev = new_model.assign(chunks, n_jobs=-1, embedder=embedding_engine(),
+                                                   score_col=score_col)
+                base    = handle.get()
+                vectors = None
+                if new_model.vectorizer == "embeddings":
+                    # The base rows' Text is gone — reuse their indexed vectors
+                    new_vecs = embedding_engine().encode(clean_texts(new_rev["Text"].tolist()))
+                    vectors  = np.vstack([base.vectors(), new_vecs])
+                rev_df = pd.concat([base.reviews.frame, with_display_columns(new_rev)], ignore_index=True)
+                new_handle = analysis_store().put(key, build_analysis(
+                    sum_df.copy(), rev_df, new_model, vectors, embedder=embedding_engine(),
+                ))
+        st.session_state.upload_analysis    = new_handle
+        st.session_state.upload_summary_job = None
+        st.rerun()
+
+
+@st.fragment(run_every=2)
+def poll_summary_job():
+    """Swap in the BART summaries once the background job finishes."""
+    job = st.session_state.upload_summary_job
+    if job is None:
+        return
+    if not job.done():
+        st.markdown(
+            '<div class="result-banner">⟳ &nbsp;Writing AI summaries in the background — '
+            'you can keep exploring.</div>',
+            unsafe_allow_html=True,
+        )
+        return
+    st.session_state.upload_summary_job = None
+    analysis = st.session_state.upload_analysis.get()
+    try:
+        sum_df = job.result()
+    except ImportError as e:
+        package = install_hint(e.name or "transformers")
+        st.error(f"{package} is required for AI summaries. Run: `pip install {package}`")
+        return
+    except Exception as e:
+        st.error(f"Summarization failed: {e}")
+        return
+    # Shared analysis — every session on this upload gets the new summaries
+    analysis.summaries = sum_df
+    analysis.model.summaries["summary"] = sum_df["summary"].to_numpy()
+    st.rerun()
+
+
+def render_summary_job():
+    """Offer BART summaries for an upload and run them off the script thread."""
+    if st.session_state.upload_summary_job is None:
+        _, btn_col = st.columns([7, 3])
+        with btn_col:
+            if st.button("✦ Write AI summaries (BART)", key="run_summaries", type="secondary"):
+                analysis = st.session_state.upload_analysis.get()
+                st.session_state.upload_summary_job = summary_executor().submit(
+                    summarize_topics, analysis.reviews.frame, analysis.summaries, bart_summarizer(),
+                    text_col="body",
+                )
+    if st.session_state.upload_summary_job is not None:    # idle sessions get no 2 s rerun timer
+        poll_summary_job()
+
+
 def page_upload_result():
     """Dashboard shown after the user's pipeline completes — mirrors demo page."""
     render_header(tag="◈ Your Data")
     render_back_button(dest="landing", key="back_upload_result")
 
-    sum_df = st.session_state.upload_summaries
-    rev_df = st.session_state.upload_reviews
+    if st.session_state.upload_analysis is None:
+        # Fresh session (e.g. a page refresh) — reopen the analysis named in the URL
+        if not open_job_result(st.query_params.get("job")):
+            go_to("upload")
+
+    analysis  = st.session_state.upload_analysis.get()
+    sum_df    = analysis.summaries
+    rev_store = analysis.reviews
 
     st.markdown(f"""
     <div class="result-banner">
         ✦ &nbsp;Analysis complete —
-        <strong>{fmt(st.session_state.upload_n_reviews)} reviews</strong> grouped into
-        <strong>{st.session_state.upload_n_topics} topics</strong>
+        <strong>{fmt(len(rev_store))} reviews</strong> grouped into
+        <strong>{len(sum_df)} topics</strong>
         &nbsp;·&nbsp;
         <span style="color:#555">scroll down to explore</span>
     </div>
@@ -1276,27 +1520,155 @@ def page_upload_result():
     with reset_col:
         if st.button("↺ New Upload", key="reset_upload", type="secondary"):
             st.session_state.upload_done      = False
-            st.session_state.upload_summaries = None
-            st.session_state.upload_reviews   = None
+            st.session_state.upload_analysis  = None
+            st.session_state.upload_summary_job = None
+            st.session_state.upload_timings   = None
             st.session_state.upload_selected  = None
+            st.query_params.pop("job", None)
             go_to("upload")
 
+    render_add_reviews()
+    if st.session_state.upload_timings:
+        with st.expander("⏱ Pipeline timing"):
+            render_stage_timings(st.session_state.upload_timings)
+    render_summary_job()
+
     render_dashboard(
         summaries_df  = sum_df,
-        reviews_df    = rev_df,
-        hero_reviews  = st.session_state.upload_n_reviews,
-        hero_topics   = st.session_state.upload_n_topics,
+        topic_reviews = rev_store.topic(st.session_state.upload_selected),
+        hero_reviews  = len(rev_store),
+        hero_topics   = len(sum_df),
         hero_summaries= len(sum_df),
         selected_key  = "upload_selected",
+        search_index  = analysis.index,
+        semantic      = analysis.semantic,
+        fetch_rows    = rev_store.rows,
     )
     render_footer()
     st.stop()
 
 
+STEPS = ["Cleaning text", "Vectorizing", "Topic modeling", "Summarizing"]   # one per pipeline STAGES
+
+
+def render_steps(active_idx: int):
+    items = ""
+    for i, label in enumerate(STEPS):
+        if i < active_idx:
+            cls, dot_content = "done", "✓"
+        elif i == active_idx:
+            cls, dot_content = "active", "⟳"
+        else:
+            cls, dot_content = "", str(i + 1)
+        items += f'<div class="step-item {cls}"><div class="step-dot">{dot_content}</div>{label}</div>'
+        if i < len(STEPS) - 1:
+            items += '<div class="step-line"></div>'
+    st.markdown(f'<div class="step-tracker">{items}</div>', unsafe_allow_html=True)
+
+
+def render_stage_timings(stages: list):
+    """One line per finished pipeline stage — rows, wall time, memory high-water mark."""
+    labels = {**dict(zip(STAGES, STEPS)), "index": "Indexing"}
+    lines  = ""
+    for t in stages:
+        peak   = "" if t["peak_rss_mb"] is None else f' &nbsp;·&nbsp; peak {t["peak_rss_mb"]:,.0f} MB'
+        lines += (
+            f'<div>{labels.get(t["stage"], t["stage"])} &nbsp;·&nbsp; {fmt(t["rows"])} rows &nbsp;·&nbsp; '
+            f'{t["seconds"]:.2f} s{peak}{" &nbsp;·&nbsp; cached" if t["cached"] else ""}</div>'
+        )
+    st.markdown(f'<div style="font-size:0.75rem;color:#555;line-height:1.8;margin:0.5rem 0 1rem">{lines}</div>',
+                unsafe_allow_html=True)
+
+
+def open_job_result(job_id) -> bool:
+    """Point the session at a finished analysis job; False if there is none.
+
+    The analysis is loaded into the shared store once — later sessions on the same
+    upload (or the same job) just take a handle on it.
+    """
+    status = job_queue().status(job_id) if job_id else None
+    if not status or status["state"] != "done":
+        return False
+    key    = status.get("key") or job_id
+    handle = analysis_store().open(key)
+    if handle is None:
+        # The worker already built and indexed it — this is an unpickle
+        analysis = job_queue().result(job_id)
+        if isinstance(analysis, tuple):    # a raw result left by an older worker
+            analysis = build_analysis(*analysis, embedder=embedding_engine())
+        attach_embedder(analysis)
+        handle = analysis_store().put(key, analysis)
+    st.session_state.upload_analysis = handle
+    st.session_state.upload_timings  = status.get("stages")
+    st.session_state.upload_selected = int(handle.get().summaries["topic_id"].iloc[0])
+    st.session_state.upload_done     = True
+    return True
+
+
+@st.fragment(run_every=0.5)
+def poll_analysis_job(job_id: str):
+    """Step tracker for a running job, redrawn from its on-disk status twice a second."""
+    status = job_queue().status(job_id) or {"state": "interrupted"}
+    if status["state"] not in ("queued", "running"):
+        st.rerun()
+
+    stage = status.get("stage")
+    idx   = len(STAGES) if stage in ("done", "index") else STAGES.index(stage) if stage in STAGES else 0
+    render_steps(idx)
+    st.progress(int(100 * idx / len(STAGES)))
+    if status["state"] == "queued":
+        detail = "Waiting for a worker…"
+    else:
+        elapsed = time.time() - status.get("created", time.time())
+        detail  = f"{fmt(status.get('rows', 0))} reviews &nbsp;·&nbsp; {elapsed:.0f} s elapsed"
+    st.markdown(f'<div style="font-size:0.75rem;color:#555;margin:0.5rem 0 0">{detail}</div>',
+                unsafe_allow_html=True)
+    render_stage_timings(status.get("stages", []))
+    if st.button("Cancel analysis", key="cancel_job", type="secondary"):
+        job_queue().cancel(job_id)
+        st.query_params.pop("job", None)
+        st.rerun()
+
+
+FAST_JOB_WAIT = 0.5    # seconds to wait in-line for a job before showing the tracker
+
+
+def render_analysis_job() -> bool:
+    """Track the job in the URL, if any. True while it is still running.
+
+    Small uploads usually finish within FAST_JOB_WAIT, so they go straight to the
+    dashboard instead of paying for a tracker render and a poll interval.
+    """
+    job_id = st.query_params.get("job")
+    status = job_queue().wait(job_id, FAST_JOB_WAIT) if job_id else None
+    if status is None:
+        return False
+    if status["state"] in ("queued", "running"):
+        poll_analysis_job(job_id)
+        return True
+    if open_job_result(job_id):
+        go_to("upload_result")
+
+    st.query_params.pop("job", None)
+    if status["state"] == "failed" and status.get("missing"):
+        package = install_hint(status["missing"])
+        st.error(f"{package} is required for this analysis. Run: `pip install {package}`")
+    elif status["state"] == "failed":
+        st.error(f"Analysis failed: {status.get('error')}")
+    elif status["state"] == "interrupted":
+        st.error("The analysis was interrupted by a server restart — please run it again.")
+    return False
+
+
 def page_upload():
     render_header(tag="◈ Your Data")
     render_back_button(dest="landing", key="back_upload")
 
+    job_queue()   # starts (and warms) the worker while the user picks a file
+    if render_analysis_job():
+        render_footer()
+        st.stop()
+
     # ── Upload form ───────────────────────────────────────────────────────────
     st.markdown('<div class="upload-title">Analyze Your Reviews</div>', unsafe_allow_html=True)
     st.markdown(
@@ -1340,34 +1712,62 @@ def page_upload():
 
         if uploaded is not None:
             try:
-                preview_df = pd.read_csv(uploaded)
-                uploaded.seek(0)
+                preview_df = read_preview(uploaded)
             except Exception as e:
                 st.error(f"Could not read file: {e}")
                 return
 
-            text_columns = [c for c in preview_df.columns if preview_df[c].dtype == object]
-            if not text_columns:
+            text_cols = text_columns(preview_df)
+            if not text_cols:
                 st.error("No text columns found in this CSV.")
                 return
 
             col_pick = st.selectbox(
                 "Which column contains the review text?",
-                options=text_columns,
+                options=text_cols,
                 index=0,
             )
+            score_col = detect_score_col(preview_df.columns)
+            n_preview = len(preview_df)
+            rows_lbl  = f"{fmt(n_preview)}+" if n_preview >= PREVIEW_ROWS else fmt(n_preview)
 
             n_topics_slider = st.slider(
                 "How many topics to discover?",
                 min_value=3,
-                max_value=min(20, max(3, len(preview_df) // 10)),
-                value=min(8, max(3, len(preview_df) // 10)),
+                max_value=min(20, max(3, n_preview // 10)),
+                value=min(8, max(3, n_preview // 10)),
                 step=1,
             )
 
+            engine_pick = st.selectbox(
+                "Clustering engine",
+                options=list(CLUSTER_ENGINES),
+                format_func=CLUSTER_ENGINES.get,
+                index=0,
+                help="Auto uses full KMeans for small files, mini-batch KMeans for large ones and "
+                     "KMeans sharded across all cores for the largest.",
+            )
+
+            vectorizer_pick = st.selectbox(
+                "Vectorizer",
+                options=list(VECTORIZERS),
+                format_func=VECTORIZERS.get,
+                index=0,
+                help="Auto switches to fit-free hashed TF-IDF for large files.",
+            )
+
+            summary_pick = st.selectbox(
+                "Topic summaries",
+                options=list(SUMMARY_MODES),
+                format_func=SUMMARY_MODES.get,
+                index=0,
+                help="Auto picks the most central, non-repetitive sentences for large files. "
+                     "AI (BART) summaries can be generated from the results page.",
+            )
+
             st.markdown(f"""
             <div style="font-size:0.75rem;color:#333;margin:0.5rem 0 1rem">
-                {fmt(len(preview_df))} rows detected &nbsp;·&nbsp; {len(preview_df.columns)} columns
+                {rows_lbl} rows detected &nbsp;·&nbsp; {len(preview_df.columns)} columns
             </div>
             """, unsafe_allow_html=True)
 
@@ -1376,68 +1776,16 @@ def page_upload():
                 run = st.button("Run Analysis  →", key="run_analysis", type="primary", use_container_width=True)
 
             if run:
-                full_df = pd.read_csv(uploaded)
-
-                # ── Step tracker placeholder ──────────────────────────────
-                tracker_slot = st.empty()
-                progress_bar = st.progress(0)
-
-                STEPS = ["Cleaning text", "Vectorizing", "Topic modeling", "Summarizing"]
-
-                def draw_steps(active_idx: int):
-                    items = ""
-                    for i, label in enumerate(STEPS):
-                        if i < active_idx:
-                            cls, dot_content = "done", "✓"
-                        elif i == active_idx:
-                            cls, dot_content = "active", "⟳"
-                        else:
-                            cls, dot_content = "", str(i + 1)
-                        items += f'<div class="step-item {cls}"><div class="step-dot">{dot_content}</div>{label}</div>'
-                        if i < len(STEPS) - 1:
-                            items += '<div class="step-line"></div>'
-                    tracker_slot.markdown(f'<div class="step-tracker">{items}</div>', unsafe_allow_html=True)
-
-                try:
-                    draw_steps(0)
-                    full_df[col_pick] = full_df[col_pick].fillna("").astype(str)
-                    time.sleep(0.4)
-                    progress_bar.progress(15)
-
-                    draw_steps(1)
-                    time.sleep(0.3)
-                    progress_bar.progress(35)
-
-                    draw_steps(2)
-                    sum_df, rev_df = run_analysis(full_df, col_pick, n_topics_slider)
-                    progress_bar.progress(75)
-
-                    draw_steps(3)
-                    time.sleep(0.4)
-                    progress_bar.progress(100)
-
-                    draw_steps(len(STEPS))
-                    time.sleep(0.3)
-
-                    tracker_slot.empty()
-                    progress_bar.empty()
-
-                    st.session_state.upload_summaries = sum_df
-                    st.session_state.upload_reviews   = rev_df
-                    st.session_state.upload_n_reviews = len(full_df)
-                    st.session_state.upload_n_topics  = len(sum_df)
-                    st.session_state.upload_selected  = int(sum_df["topic_id"].iloc[0])
-                    st.session_state.upload_done      = True
-                    go_to("upload_result")
-
-                except ImportError:
-                    tracker_slot.empty()
-                    progress_bar.empty()
-                    st.error("scikit-learn is required for analysis. Run: `pip install scikit-learn`")
-                except Exception as e:
-                    tracker_slot.empty()
-                    progress_bar.empty()
-                    st.error(f"Analysis failed: {e}")
+                digest = file_digest(uploaded)
+                params = dict(n_topics=n_topics_slider, engine=engine_pick, vectorizer=vectorizer_pick,
+                              summary=summary_pick)
+                # Identical uploads (same file, column and settings) share one job and one analysis
+                st.query_params["job"] = job_queue().submit(
+                    uploaded, col_pick, score_col,
+                    key=upload_key(digest, col_pick, score_col, *sorted(params.items())),
+                    n_jobs=-1, data_key=digest, **params,
+                )
+                st.rerun()
 
     render_footer()
     st.stop()
@@ -0,0 +1,129 @@
+"""Columnar demo artifacts — topic-partitioned Parquet written once, memory-mapped on load.
+
+    python artifacts.py data/            # convert data/*.csv → data/*.parquet
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pipeline import review_titles, with_topic_view
+
+REVIEWS_FILE   = "reviews.parquet"
+SUMMARIES_FILE = "topic_summaries.parquet"
+REVIEW_COLUMNS = ["topic", "Score", "Summary", "Text"]
+
+REVIEW_SCHEMA = pa.schema([
+    ("topic",   pa.int32()),
+    ("Score",   pa.float32()),
+    ("Summary", pa.string()),
+    ("Text",    pa.string()),
+])
+_ROW_GROUPS_KEY = b"topic_row_groups"
+
+
+def has_artifacts(data_dir) -> bool:
+    data_dir = Path(data_dir)
+    return (data_dir / REVIEWS_FILE).exists() and (data_dir / SUMMARIES_FILE).exists()
+
+
+def review_columns(reviews_df: pd.DataFrame) -> pd.DataFrame:
+    """reviews_df as REVIEW_COLUMNS, with Summary filled from Text where the data has none."""
+    return reviews_df.assign(Summary=review_titles(reviews_df))[REVIEW_COLUMNS]
+
+
+def build_artifacts(reviews_df: pd.DataFrame, summaries_df: pd.DataFrame, out_dir) -> Path:
+    """Write reviews sorted by topic, one Parquet row group per topic, plus the topic view.
+
+    Outlier reviews (topic -1) are dropped, as the dashboard never shows them; the
+    topic → row group map is stored in the file's schema metadata. Summaries carry the
+    precomputed per-topic stats, score histogram, sample rows and keywords.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    reviews = reviews_df.copy()
+    reviews.columns = reviews.columns.str.strip()
+    reviews["Score"] = pd.to_numeric(reviews["Score"], errors="coerce")
+    reviews = review_columns(reviews[reviews["topic"] != -1])
+    reviews = reviews.sort_values("topic", kind="stable").reset_index(drop=True)
+    reviews = reviews.astype({"topic": np.int32, "Score": np.float32})
+
+    table   = pa.Table.from_pandas(reviews, schema=REVIEW_SCHEMA, preserve_index=False)
+    topics  = reviews["topic"].to_numpy()
+    starts  = np.flatnonzero(np.r_[True, topics[1:] != topics[:-1]]) if len(topics) else np.array([], int)
+    bounds  = np.r_[starts, len(topics)]
+    groups  = {int(topics[s]): i for i, s in enumerate(starts)}
+    schema  = REVIEW_SCHEMA.with_metadata({_ROW_GROUPS_KEY: json.dumps(groups).encode()})
+
+    with pq.ParquetWriter(out_dir / REVIEWS_FILE, schema) as writer:
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            writer.write_table(table.slice(a, b - a), row_group_size=max(1, b - a))
+
+    summaries = summaries_df.copy()
+    summaries.columns = summaries.columns.str.strip()
+    summaries = summaries[summaries["topic_id"] != -1]
+    summaries = with_topic_view(summaries, reviews["topic"], reviews["Score"])
+    summaries.to_parquet(out_dir / SUMMARIES_FILE, index=False)
+    return out_dir
+
+
+def convert_csv(data_dir):
+    """Build Parquet artifacts from the notebook's reviews_with_topics.csv / topic_summaries.csv."""
+    data_dir = Path(data_dir)
+    reviews   = pd.read_csv(data_dir / "reviews_with_topics.csv")
+    summaries = pd.read_csv(data_dir / "topic_summaries.csv")
+    return build_artifacts(reviews, summaries, data_dir)
+
+
+def read_summaries(data_dir) -> pd.DataFrame:
+    """Per-topic summaries with the topic view (stats, sample rows, keywords) precomputed."""
+    return pd.read_parquet(Path(data_dir) / SUMMARIES_FILE)
+
+
+def _reviews_file(data_dir):
+    pf     = pq.ParquetFile(Path(data_dir) / REVIEWS_FILE, memory_map=True)
+    groups = json.loads(pf.schema_arrow.metadata[_ROW_GROUPS_KEY])
+    sizes  = [pf.metadata.row_group(i).num_rows for i in range(pf.num_row_groups)]
+    starts = np.r_[0, np.cumsum(sizes)].astype(np.int64)
+    return pf, {int(t): g for t, g in groups.items()}, starts
+
+
+def _read_groups(pf, starts, wanted, columns) -> pd.DataFrame:
+    # Index = row id in the file's topic-sorted order, the id search / ANN results use
+    df = pf.read_row_groups(wanted, columns=list(columns)).to_pandas()
+    df.index = np.concatenate([np.arange(starts[g], starts[g + 1]) for g in wanted]) if wanted else []
+    return df
+
+
+def read_topic_reviews(data_dir, topic: int, columns=REVIEW_COLUMNS) -> pd.DataFrame:
+    """One topic's reviews — reads a single row group and only the requested columns."""
+    pf, groups, starts = _reviews_file(data_dir)
+    if int(topic) not in groups:
+        return pf.schema_arrow.empty_table().select(list(columns)).to_pandas()
+    return _read_groups(pf, starts, [groups[int(topic)]], columns)
+
+
+def read_reviews(data_dir, columns=REVIEW_COLUMNS, topics=None) -> pd.DataFrame:
+    """All reviews (or only those in topics), in topic order."""
+    pf, groups, starts = _reviews_file(data_dir)
+    wanted = sorted(groups.values()) if topics is None else sorted(groups[int(t)] for t in topics if int(t) in groups)
+    return _read_groups(pf, starts, wanted, columns)
+
+
+def read_rows(data_dir, row_ids, columns=REVIEW_COLUMNS) -> pd.DataFrame:
+    """Reviews by row id, in the order given — touches only the row groups they live in."""
+    pf, _, starts = _reviews_file(data_dir)
+    row_ids = np.asarray(row_ids, dtype=np.int64)
+    wanted  = sorted(set(np.searchsorted(starts, row_ids, side="right") - 1))
+    return _read_groups(pf, starts, wanted, columns).loc[row_ids]
+
+
+if __name__ == "__main__":
+    out = convert_csv(sys.argv[1] if len(sys.argv) > 1 else "data")
+    print(f"Wrote {out / REVIEWS_FILE} and {out / SUMMARIES_FILE}")
@@ -0,0 +1,375 @@
+"""Benchmarks for the analysis pipeline.
+
+    python bench.py clean --rows 200000 --jobs 1 2 4
+    python bench.py latency --rows 1000 --budget 1.0     # exits 1 when over budget
+    python bench.py memory --rows 100000                  # bytes per review held for one analysis
+    python bench.py scaling --rows 1000000 --jobs 1 2 4 8  # sharded pipeline speedup per worker count
+    python bench.py suite --sizes 1000 10000 100000 --lengths poisson lognormal
+    python bench.py compare bench_results/abc1234.json bench_results/def5678.json
+"""
+
+import argparse
+import json
+import pickle
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline import _SPAWN, clean_text, clean_texts, peak_rss_mb, resolve_workers
+
+VOCAB = (
+    "coffee tea taste flavor dog treat chew price amazon order box package shipping "
+    "arrived great good love best bad stale bitter sweet chocolate candy snack bag "
+    "product buy store sugar salt spicy organic healthy cat food water drink cup"
+).split()
+
+
+LENGTHS = ("poisson", "lognormal", "fixed")    # review length distributions
+
+
+def synthetic_reviews(n_rows: int, mean_words: int = 60, seed: int = 42, lengths: str = "poisson") -> list:
+    """Review-like strings with mixed case, punctuation and the odd HTML tag.
+
+    lengths picks the words-per-review distribution: "poisson" (narrow), "lognormal"
+    (long tail of essays, like real review dumps) or "fixed"; all average mean_words.
+    """
+    rng = np.random.default_rng(seed)
+    if lengths == "poisson":
+        lengths = rng.poisson(mean_words, n_rows)
+    elif lengths == "lognormal":
+        sigma   = 0.9
+        lengths = rng.lognormal(np.log(mean_words) - sigma ** 2 / 2, sigma, n_rows).astype(int)
+    elif lengths == "fixed":
+        lengths = np.full(n_rows, mean_words)
+    else:
+        raise ValueError(f"Unknown length distribution: {lengths!r}")
+    lengths = np.maximum(3, lengths)
+    words   = np.array(VOCAB + [w.capitalize() + "!" for w in VOCAB] + ["<br />", "5-star", "..."])
+    picks   = rng.integers(0, len(words), lengths.sum())
+    bounds  = np.concatenate(([0], np.cumsum(lengths)))
+    return [" ".join(words[picks[a:b]]) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def bench_clean(rows: int, jobs: list):
+    texts    = synthetic_reviews(rows)
+    expected = [clean_text(t) for t in texts[:1000]]
+    print(f"clean_texts · {rows:,} reviews")
+    for n_jobs in jobs:
+        workers = resolve_workers(n_jobs)
+        start   = time.perf_counter()
+        out     = clean_texts(texts, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - start
+        assert out[:1000] == expected, "parallel output differs from clean_text"
+        rate = rows / elapsed
+        print(f"  jobs={workers:<3} {elapsed:7.2f}s  {rate:12,.0f} rows/s  {rate / workers:12,.0f} rows/s/core")
+
+
+LATENCY_BUDGET = 1.0    # seconds from "Run Analysis" to a dashboard-ready result, 1k-row CSV
+
+
+def bench_latency(rows: int, budget: float, n_topics: int = 8) -> bool:
+    """Upload → dashboard latency through the same path as the app, against a budget.
+
+    Runs a job on a pre-warmed JobQueue (the app starts it when the upload page opens),
+    then loads the Analysis the job built (display columns, topic store and search
+    index, as the app serves it). Returns True within budget.
+    """
+    from jobs import JobQueue
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = Path(tmp) / "reviews.csv"
+        rng = np.random.default_rng(0)
+        pd.DataFrame({"Score": rng.integers(1, 6, rows), "Text": synthetic_reviews(rows)}).to_csv(csv, index=False)
+
+        queue = JobQueue(root=Path(tmp) / "jobs")
+        start = time.perf_counter()
+        queue.ready()
+        warm  = time.perf_counter() - start
+
+        start  = time.perf_counter()
+        job_id = queue.submit(csv, "Text", "Score", n_topics=n_topics, n_jobs=-1)
+        status = queue.wait(job_id, timeout=None)
+        t_job  = time.perf_counter() - start
+        if status["state"] != "done":
+            print(f"job {status['state']}: {status.get('error')}")
+            return False
+
+        queue.result(job_id)
+        total = time.perf_counter() - start
+
+    print(f"upload latency · {rows:,} reviews · budget {budget:.2f}s")
+    print(f"  worker warm-up   {warm:7.2f}s  (overlaps with picking a file)")
+    for stage in status["stages"]:
+        print(f"  {stage['stage']:<16} {stage['seconds']:7.2f}s")
+    print(f"  job round trip   {t_job:7.2f}s")
+    print(f"  dashboard ready  {total:7.2f}s  {'OK' if total <= budget else 'OVER BUDGET'}")
+    return total <= budget
+
+
+# ── SUITE ───────────────────────────────────────────────────────────────────────
+
+QUERIES = ("coffee", "tas", "great box", "5-star")    # word, prefix, AND, substring fallback
+
+
+def bench_scaling(rows: int, jobs: list, n_topics: int = 8):
+    """Sharded pipeline (clean → hashed TF-IDF → sharded KMeans) wall time per worker count.
+
+    Speedup is against the first entry of jobs; ARI compares each run's topics with it
+    (sharded KMeans seeds independently of the worker count, so it should stay 1.0).
+    """
+    from sklearn.metrics import adjusted_rand_score
+
+    from pipeline import _vectorize, fit_sharded
+
+    texts = synthetic_reviews(rows)
+    print(f"sharded pipeline · {rows:,} reviews · {n_topics} topics · {resolve_workers(-1)} cores")
+    print(f"  {'workers':>7} {'clean':>8} {'vectorize':>10} {'cluster':>8} {'total':>8} {'speedup':>8} {'ARI':>6}")
+    base = None
+    for n_jobs in jobs:
+        start   = time.perf_counter()
+        cleaned = clean_texts(texts, n_jobs=n_jobs)
+        t_clean = time.perf_counter() - start
+        X, _    = _vectorize(cleaned, "hashing", n_jobs)
+        t_vec   = time.perf_counter() - start - t_clean
+        labels, _ = fit_sharded(X, n_topics, n_jobs=n_jobs)
+        total   = time.perf_counter() - start
+        base    = base or (total, labels)
+        print(f"  {resolve_workers(n_jobs):>7} {t_clean:7.2f}s {t_vec:9.2f}s {total - t_clean - t_vec:7.2f}s "
+              f"{total:7.2f}s {base[0] / total:7.2f}x {adjusted_rand_score(base[1], labels):6.3f}")
+
+
+def bench_memory(rows: int, n_topics: int = 8):
+    """Bytes per review of run_analysis's reviews frame, against the layout it used to return,
+    and of the Analysis the dashboard's AnalysisStore holds for it.
+
+    The old layout kept the upload's text column, a Text copy of it, an 80-char Summary
+    copy, a float64 Score and an int32 topic. "in memory" is what pandas reports (shared
+    buffers counted once per column); "pickled" is what a job result or cache entry stores.
+    The "held" row is Analysis.nbytes — display frame, search index and topic table, the
+    figure the store evicts by — and its pickle is what a spill writes.
+    """
+    from pipeline import run_analysis
+    from store import build_analysis
+
+    rng = np.random.default_rng(0)
+    df  = pd.DataFrame({"Score": rng.integers(1, 6, rows), "review": synthetic_reviews(rows)})
+    sum_df, rev_df, model = run_analysis(df, "review", n_topics, return_model=True)
+
+    text   = df["review"].astype(str)
+    before = pd.DataFrame({
+        "review":  text,
+        "Score":   rev_df["Score"].astype(np.float64),
+        "topic":   rev_df["topic"].astype(np.int32),
+        "Summary": text.str[:80],
+        "Text":    text,
+    })
+    print(f"reviews frame · {rows:,} reviews")
+    print(f"  {'':<8} {'in memory':>16} {'pickled':>16}   columns")
+    for label, frame in (("before", before), ("after", rev_df)):
+        in_mem = frame.memory_usage(deep=True).sum() / rows
+        pickled = len(pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)) / rows
+        dtypes = ", ".join(f"{c}:{t}" for c, t in frame.dtypes.astype(str).items())
+        print(f"  {label:<8} {in_mem:10,.0f} B/rev {pickled:10,.0f} B/rev   {dtypes}")
+
+    analysis = build_analysis(sum_df, rev_df, model)
+    store    = analysis.reviews
+    pickled  = len(pickle.dumps(analysis, protocol=pickle.HIGHEST_PROTOCOL)) / rows
+    dtypes   = ", ".join(f"{c}:{t}" for c, t in store.frame.dtypes.astype(str).items())
+    print(f"  {'held':<8} {analysis.nbytes / rows:10,.0f} B/rev {pickled:10,.0f} B/rev   {dtypes} + index")
+
+
+def _timed(fn, *args, repeat: int = 1, **kwargs):
+    """(result, best wall time over repeat calls)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out   = fn(*args, **kwargs)
+        best  = min(best, time.perf_counter() - start)
+    return out, best
+
+
+def _bench_size(rows: int, lengths: str, mean_words: int, n_topics: int, n_jobs: int) -> list:
+    """Every timed operation for one corpus; runs in its own process so memory is per size."""
+    from artifacts import build_artifacts, read_summaries, read_topic_reviews
+    from pipeline import run_analysis, with_topic_view
+    from search import ReviewIndex
+    from store import TopicStore
+    import sklearn.cluster                  # noqa: F401 — keep import time out of the first stage
+    import sklearn.feature_extraction.text  # noqa: F401
+
+    rng     = np.random.default_rng(0)
+    texts   = synthetic_reviews(rows, mean_words, lengths=lengths)
+    df      = pd.DataFrame({"Score": rng.integers(1, 6, rows), "Text": texts})
+    records = []
+
+    def record(op, seconds, **extra):
+        peak = peak_rss_mb()
+        records.append({"rows": rows, "lengths": lengths, "op": op, "seconds": round(seconds, 6),
+                        "peak_rss_mb": None if peak is None else round(peak, 1), **extra})
+
+    _, t = _timed(clean_texts, texts, n_jobs=n_jobs)
+    record("clean_texts", t)
+
+    stages = []
+    (sum_df, rev_df), t = _timed(run_analysis, df, "Text", n_topics, n_jobs=n_jobs,
+                                 progress=lambda stage, n, done: stages.__setitem__(slice(None), done))
+    for stage in stages:
+        record(f"run_analysis.{stage['stage']}", stage["seconds"])
+    record("run_analysis", t, bytes_per_review=int(rev_df.memory_usage(deep=True).sum() / rows))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rev_df.to_csv(Path(tmp) / "reviews_with_topics.csv", index=False)
+        sum_df[["topic_id", "topic_name", "summary"]].to_csv(Path(tmp) / "topic_summaries.csv", index=False)
+
+        def load_csv():
+            summaries = pd.read_csv(Path(tmp) / "topic_summaries.csv")
+            reviews   = pd.read_csv(Path(tmp) / "reviews_with_topics.csv")
+            return with_topic_view(summaries, reviews["topic"], reviews["Score"]), reviews
+
+        _, t = _timed(load_csv)
+        record("load_demo_data.csv", t)
+        _, t = _timed(build_artifacts, rev_df, sum_df[["topic_id", "topic_name", "summary"]], tmp)
+        record("build_artifacts", t)
+        _, t = _timed(read_summaries, tmp, repeat=3)
+        record("load_demo_summaries.parquet", t)
+        topics = sum_df["topic_id"].tolist()
+        _, t = _timed(lambda: [read_topic_reviews(tmp, tid) for tid in topics], repeat=3)
+        record("load_demo_topic.parquet", t / len(topics))
+
+    store, t = _timed(TopicStore, rev_df)
+    record("topic_store.build", t)
+    _, t = _timed(lambda: [store.topic(tid) for tid in topics], repeat=5)
+    record("dashboard.topic_switch", t / len(topics))
+    samples = dict(zip(sum_df["topic_id"], sum_df["sample_rows"]))
+    _, t = _timed(lambda: [store.topic(tid).iloc[samples[tid]] for tid in topics], repeat=5)
+    record("dashboard.sample", t / len(topics))
+
+    index, t = _timed(ReviewIndex, store.frame)
+    record("search_index.build", t)
+    for query in QUERIES:
+        _, t = _timed(lambda: [index.search(tid, query) for tid in topics], repeat=5)
+        record(f"dashboard.search[{query}]", t / len(topics))
+    return records
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+        dirty  = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                                text=True, cwd=Path(__file__).parent).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def bench_suite(sizes: list, lengths: list, mean_words: int, n_topics: int, n_jobs: int, out) -> Path:
+    """Time every stage and dashboard operation per corpus size; write JSON to out."""
+    commit  = git_commit()
+    results = []
+    for dist in lengths:
+        for rows in sorted(sizes):
+            with ProcessPoolExecutor(max_workers=1, mp_context=_SPAWN) as pool:
+                records = pool.submit(_bench_size, rows, dist, mean_words, n_topics, n_jobs).result()
+            results.extend(records)
+            print(f"{dist} · {rows:,} reviews")
+            for r in records:
+                peak = "" if r["peak_rss_mb"] is None else f"   peak {r['peak_rss_mb']:8.1f} MB"
+                print(f"  {r['op']:<32} {r['seconds'] * 1000:11.2f} ms{peak}")
+
+    out = Path(out or Path("bench_results") / f"{commit}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "commit":     commit,
+        "timestamp":  time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python":     platform.python_version(),
+        "platform":   platform.platform(),
+        "cpu_count":  resolve_workers(-1),
+        "params":     {"mean_words": mean_words, "n_topics": n_topics, "n_jobs": n_jobs},
+        "results":    results,
+    }, indent=1))
+    print(f"Wrote {out}")
+    return out
+
+
+def bench_compare(old_path, new_path, threshold: float = 1.2, min_delta: float = 0.002) -> bool:
+    """Side-by-side timings of two suite runs.
+
+    False if any op slowed by more than threshold × and by more than min_delta seconds —
+    sub-millisecond ops jitter by more than 20% run to run.
+    """
+    old, new = (json.loads(Path(p).read_text()) for p in (old_path, new_path))
+    before   = {(r["lengths"], r["rows"], r["op"]): r["seconds"] for r in old["results"]}
+    ok       = True
+    print(f"{old['commit']} → {new['commit']}")
+    for r in new["results"]:
+        key = (r["lengths"], r["rows"], r["op"])
+        if key not in before:
+            continue
+        ratio = r["seconds"] / before[key] if before[key] else float("inf")
+        slow  = ratio > threshold and r["seconds"] - before[key] > min_delta
+        flag  = "  REGRESSION" if slow else ""
+        ok   &= not slow
+        print(f"  {key[0]:<9} {key[1]:>9,} {key[2]:<32} {before[key] * 1000:10.2f} → "
+              f"{r['seconds'] * 1000:10.2f} ms  {ratio:5.2f}x{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub    = parser.add_subparsers(dest="cmd", required=True)
+
+    p_clean = sub.add_parser("clean", help="clean_text throughput per core")
+    p_clean.add_argument("--rows", type=int, default=200_000)
+    p_clean.add_argument("--jobs", type=int, nargs="+", default=[1, -1])
+
+    p_lat = sub.add_parser("latency", help="upload → dashboard latency against a budget")
+    p_lat.add_argument("--rows", type=int, default=1_000)
+    p_lat.add_argument("--budget", type=float, default=LATENCY_BUDGET)
+
+    p_mem = sub.add_parser("memory", help="bytes per review of the reviews frame and of a held analysis")
+    p_mem.add_argument("--rows", type=int, default=100_000)
+    p_mem.add_argument("--topics", type=int, default=8)
+
+    p_scale = sub.add_parser("scaling", help="sharded pipeline speedup across worker counts")
+    p_scale.add_argument("--rows", type=int, default=1_000_000)
+    p_scale.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4])
+    p_scale.add_argument("--topics", type=int, default=8)
+
+    p_suite = sub.add_parser("suite", help="every stage and dashboard operation across corpus sizes → JSON")
+    p_suite.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    p_suite.add_argument("--lengths", choices=LENGTHS, nargs="+", default=["poisson"])
+    p_suite.add_argument("--mean-words", type=int, default=60)
+    p_suite.add_argument("--topics", type=int, default=8)
+    p_suite.add_argument("--jobs", type=int, default=-1)
+    p_suite.add_argument("--out", help="results file (default: bench_results/<commit>.json)")
+
+    p_cmp = sub.add_parser("compare", help="timings of two suite result files; exits 1 on regressions")
+    p_cmp.add_argument("old")
+    p_cmp.add_argument("new")
+    p_cmp.add_argument("--threshold", type=float, default=1.2)
+
+    args = parser.parse_args()
+    if args.cmd == "clean":
+        bench_clean(args.rows, args.jobs)
+    elif args.cmd == "latency":
+        sys.exit(0 if bench_latency(args.rows, args.budget) else 1)
+    elif args.cmd == "scaling":
+        bench_scaling(args.rows, args.jobs, args.topics)
+    elif args.cmd == "memory":
+        bench_memory(args.rows, args.topics)
+    elif args.cmd == "suite":
+        bench_suite(args.sizes, args.lengths, args.mean_words, args.topics, args.jobs, args.out)
+    elif args.cmd == "compare":
+        sys.exit(0 if bench_compare(args.old, args.new, args.threshold) else 1)
+
+
+if __name__ == "__main__":
+    main()
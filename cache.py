@@ -0,0 +1,109 @@
+"""Content-addressed on-disk cache for intermediate analysis stages."""
+
+import hashlib
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR       = Path(os.environ.get("REVIEW_CACHE_DIR", Path(__file__).parent / ".cache" / "analysis"))
+CACHE_MAX_BYTES = int(os.environ.get("REVIEW_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+
+def file_digest(source, block_size: int = 1 << 20) -> str:
+    """sha256 of a path or file-like object's bytes, read in blocks (file objects are rewound)."""
+    h = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    source.seek(0)
+    for block in iter(lambda: source.read(block_size), b""):
+        h.update(block)
+    source.seek(0)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Directory-per-entry store with least-recently-used eviction past max_bytes.
+
+    An entry is a set of named items written together: sparse matrices go to .npz,
+    numpy arrays to .npy and everything else (frames, lists, fitted vectorizers) to
+    pickle. Entries are published with an atomic rename, so readers never see a
+    half-written one; a load bumps the entry's mtime, which drives eviction order.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.root      = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(*parts) -> str:
+        return hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()[:32]
+
+    def load(self, key: str) -> Optional[dict]:
+        import scipy.sparse as sp
+
+        entry = self.root / key
+        if not entry.is_dir():
+            return None
+        items = {}
+        try:
+            for path in entry.iterdir():
+                if path.suffix == ".npz":
+                    items[path.stem] = sp.load_npz(path)
+                elif path.suffix == ".npy":
+                    items[path.stem] = np.load(path, allow_pickle=False)
+                elif path.suffix == ".pkl":
+                    items[path.stem] = pd.read_pickle(path)
+            os.utime(entry)
+        except (OSError, ValueError, EOFError):
+            return None          # evicted or corrupted underneath us — treat as a miss
+        return items
+
+    def save(self, key: str, **items):
+        import scipy.sparse as sp
+
+        tmp = self.root / f".tmp-{key}-{os.getpid()}-{time.monotonic_ns()}"
+        tmp.mkdir(parents=True)
+        for name, obj in items.items():
+            if sp.issparse(obj):
+                sp.save_npz(tmp / f"{name}.npz", obj.tocsr(), compressed=False)
+            elif isinstance(obj, np.ndarray) and obj.dtype != object:
+                np.save(tmp / f"{name}.npy", obj)
+            else:
+                pd.to_pickle(obj, tmp / f"{name}.pkl")
+        try:
+            os.rename(tmp, self.root / key)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)   # another writer published it first
+        self.evict(keep=key)
+
+    def evict(self, keep: Optional[str] = None):
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        entries = []
+        for entry in self.root.iterdir():
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            size = sum(p.stat().st_size for p in entry.iterdir())
+            entries.append((entry.stat().st_mtime, size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            if entry.name == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.root.mkdir(parents=True, exist_ok=True)
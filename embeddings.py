@@ -0,0 +1,186 @@
+"""Sentence-embedding stage (all-MiniLM-L6-v2) with an on-disk per-review vector cache."""
+
+import contextlib
+import hashlib
+import os
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:     # Windows: no flock, so one process at a time should write a store
+    fcntl = None
+
+import numpy as np
+
+MODEL_NAME  = "all-MiniLM-L6-v2"
+EMBED_DIM   = 384
+EMBED_DIR   = Path(os.environ.get("REVIEW_EMBED_DIR", Path(__file__).parent / ".cache" / "embeddings"))
+EMBED_BATCH = 64        # texts per forward pass
+FLUSH_ROWS  = 4_096     # new vectors appended to the store at a time
+
+
+def review_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingStore:
+    """Append-only float16 vectors on disk, addressed by review hash.
+
+    vectors.f16 is a raw (n, dim) float16 array read through a memory map and keys.bin
+    holds the matching 16-byte hashes. Vectors are written before their keys, so a
+    reader only trusts the rows both files agree on. Several processes may share a
+    store (the app and its job workers): appends are serialised by an flock on
+    store.lock, and every reader picks up rows another process added as soon as
+    keys.bin grows. After a crash mid-append the next writer trims both files back.
+    """
+
+    def __init__(self, root, dim: int = EMBED_DIM):
+        self.root  = Path(root)
+        self.dim   = dim
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._vec_path  = self.root / "vectors.f16"
+        self._key_path  = self.root / "keys.bin"
+        self._lock_path = self.root / "store.lock"
+        self._rows     = None
+        self._key_size = -1
+        self._mmap     = None
+
+    @staticmethod
+    def _size(path) -> int:
+        return path.stat().st_size if path.exists() else 0
+
+    def _load(self):
+        """Read any rows appended since the last call (by this or another process)."""
+        key_size = self._size(self._key_path)
+        if self._rows is not None and key_size == self._key_size:
+            return
+        n = min(key_size // 16, self._size(self._vec_path) // (2 * self.dim))
+        if self._rows is None or n < len(self._rows):
+            self._rows = {}
+        start = len(self._rows)
+        if n > start:
+            with open(self._key_path, "rb") as f:
+                f.seek(start * 16)
+                raw = f.read((n - start) * 16)
+            self._rows.update((raw[i * 16:(i + 1) * 16], start + i) for i in range(len(raw) // 16))
+        if len(self._rows) != start or start == 0:
+            self._mmap = None
+        self._key_size = key_size
+
+    @contextlib.contextmanager
+    def _writing(self):
+        """Exclusive writer lock (where flock exists); trims a torn append left by a crashed writer."""
+        with open(self._lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                n = min(self._size(self._key_path) // 16, self._size(self._vec_path) // (2 * self.dim))
+                for path, size in ((self._key_path, n * 16), (self._vec_path, n * 2 * self.dim)):
+                    if path.exists() and path.stat().st_size != size:
+                        os.truncate(path, size)
+                self._load()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _vectors(self) -> np.ndarray:
+        if self._mmap is None:
+            n = len(self._rows)
+            self._mmap = (
+                np.memmap(self._vec_path, dtype=np.float16, mode="r", shape=(n, self.dim))
+                if n else np.zeros((0, self.dim), np.float16)
+            )
+        return self._mmap
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._rows)
+
+    def lookup(self, hashes) -> np.ndarray:
+        """Row of each hash in the store, or -1 where it has not been embedded yet."""
+        self._load()
+        return np.fromiter((self._rows.get(h, -1) for h in hashes), dtype=np.int64, count=len(hashes))
+
+    def get(self, rows) -> np.ndarray:
+        self._load()
+        return np.asarray(self._vectors()[np.asarray(rows)], dtype=np.float32)
+
+    def append(self, hashes, vectors: np.ndarray):
+        with self._writing():
+            new = [i for i, h in enumerate(hashes) if h not in self._rows]
+            if not new:
+                return
+            vecs = np.ascontiguousarray(vectors[new], dtype=np.float16)
+            with open(self._vec_path, "ab") as f:
+                f.write(vecs.tobytes())
+            with open(self._key_path, "ab") as f:
+                f.write(b"".join(hashes[i] for i in new))
+            self._load()
+
+
+class EmbeddingEngine:
+    """CPU sentence encoder that only embeds reviews it has never seen.
+
+    encode() hashes each text, serves known ones from the EmbeddingStore and embeds the
+    rest in batches of similar length (less padding per forward pass), flushing to the
+    store as it goes. n_workers > 1 spreads batches over sentence-transformers' process
+    pool. Vectors are L2-normalised, so Euclidean KMeans behaves like cosine clustering.
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, store_dir=EMBED_DIR,
+                 batch_size: int = EMBED_BATCH, n_workers: int = 1):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.n_workers  = n_workers
+        self.store      = EmbeddingStore(Path(store_dir) / model_name.replace("/", "__"))
+        self._model     = None
+
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    def _embed(self, texts: list, pool=None) -> np.ndarray:
+        model = self.model()
+        if pool is not None:
+            return model.encode_multi_process(
+                texts, pool, batch_size=self.batch_size, normalize_embeddings=True,
+            )
+        return model.encode(
+            texts, batch_size=self.batch_size, convert_to_numpy=True,
+            normalize_embeddings=True, show_progress_bar=False,
+        )
+
+    def embed(self, texts: list) -> np.ndarray:
+        """Encode texts directly, bypassing the store (e.g. one-off search queries)."""
+        return np.asarray(self._embed(texts), dtype=np.float32)
+
+    def encode(self, texts: list) -> np.ndarray:
+        """(len(texts), dim) float32 embeddings; only unseen texts hit the model."""
+        hashes = [review_hash(t) for t in texts]
+        uniq   = list(dict.fromkeys(hashes))
+        rows   = self.store.lookup(uniq)
+
+        missing = [h for h, r in zip(uniq, rows) if r < 0]
+        if missing:
+            first   = {h: i for i, h in reversed(list(enumerate(hashes)))}
+            pending = [texts[first[h]] for h in missing]
+            # Bucket by word count so each batch pads to a similar length
+            order = np.argsort([t.count(" ") for t in pending], kind="stable")
+            pool  = (
+                self.model().start_multi_process_pool(["cpu"] * self.n_workers)
+                if self.n_workers > 1 and len(pending) > self.batch_size else None
+            )
+            try:
+                for start in range(0, len(order), FLUSH_ROWS):
+                    idx = order[start:start + FLUSH_ROWS]
+                    self.store.append([missing[i] for i in idx], self._embed([pending[i] for i in idx], pool))
+            finally:
+                if pool is not None:
+                    self.model().stop_multi_process_pool(pool)
+            rows = self.store.lookup(uniq)
+
+        pos = {h: r for h, r in zip(uniq, rows)}
+        return self.store.get([pos[h] for h in hashes])
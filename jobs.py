@@ -0,0 +1,232 @@
+"""Background analysis jobs — run_analysis on a local process pool, job state kept on disk."""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from pipeline import _SPAWN
+
+JOB_DIR     = Path(os.environ.get("REVIEW_JOB_DIR", Path(__file__).parent / ".cache" / "jobs"))
+JOB_TTL     = 24 * 3600     # seconds a finished job's files are kept
+INPUT_FILE  = "input.csv"
+STATUS_FILE = "status.json"
+RESULT_FILE = "result.pkl"
+CANCEL_FILE = "cancel"
+LOG_FILE    = "stages.jsonl"
+
+FINISHED = {"done", "failed", "cancelled", "interrupted"}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _read_status(job_dir: Path) -> Optional[dict]:
+    try:
+        return json.loads((job_dir / STATUS_FILE).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_status(job_dir: Path, **fields):
+    status = {**(_read_status(job_dir) or {}), **fields, "updated": time.time()}
+    tmp = job_dir / f".{STATUS_FILE}.{os.getpid()}"
+    tmp.write_text(json.dumps(status))
+    os.replace(tmp, job_dir / STATUS_FILE)
+
+
+def _warm_up():
+    """Import the heavy modules in a fresh worker so the first job doesn't pay for it."""
+    import sklearn.cluster                  # noqa: F401
+    import sklearn.feature_extraction.text  # noqa: F401
+    import cache                            # noqa: F401
+    import store                            # noqa: F401
+
+
+def _run_job(job_dir: str, text_col: str, score_col: Optional[str], params: dict):
+    """Worker entry point — everything it reports goes through status.json and stages.jsonl."""
+    from cache import ResultCache
+    from pipeline import StageLog, iter_chunks, log, run_analysis
+    from store import build_analysis
+
+    job_dir = Path(job_dir)
+    handler = logging.FileHandler(job_dir / LOG_FILE)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+
+    finished = []
+
+    def progress(stage: str, rows: int = 0, stages=()):
+        if (job_dir / CANCEL_FILE).exists():
+            raise JobCancelled()
+        finished[:] = stages
+        _write_status(job_dir, state="running", stage=stage, rows=rows, stages=list(stages))
+
+    try:
+        progress("start")
+        chunks = iter_chunks(str(job_dir / INPUT_FILE), text_col, score_col)
+        summaries, reviews, model = run_analysis(
+            chunks, text_col, cache=ResultCache(), progress=progress,
+            return_model=True, score_col=score_col, **params,
+        )
+        # Index here too, so the server only unpickles a ready Analysis
+        stages = StageLog(progress)
+        stages.stages = list(finished)
+        stages.start("index", len(reviews))
+        embedder = None
+        if model.vectorizer == "embeddings":
+            from embeddings import EmbeddingEngine
+            embedder = EmbeddingEngine()
+        analysis = build_analysis(summaries, reviews, model, embedder=embedder)
+        stages.close()
+        pd.to_pickle(analysis, job_dir / RESULT_FILE)
+        _write_status(job_dir, state="done")
+    except JobCancelled:
+        _write_status(job_dir, state="cancelled")
+    except ImportError as e:
+        _write_status(job_dir, state="failed", error=str(e), missing=e.name)
+    except Exception as e:
+        _write_status(job_dir, state="failed", error=str(e) or type(e).__name__)
+    finally:
+        log.removeHandler(handler)
+        handler.close()
+
+
+class JobQueue:
+    """Analyses submitted to worker processes, addressable by job id across page reloads.
+
+    Each job owns root/<job id>/ holding the uploaded CSV, a status.json the worker
+    rewrites at every stage (state, stage, rows processed, finished stages' timings), the
+    stages.jsonl log and, once done, the pickled store.Analysis — indexed in the worker,
+    so loading a result is an unpickle, not a rebuild on the caller's thread. Callers
+    poll status(); cancel() drops a queued job and asks a running one to stop at its
+    next progress report — once every caller that submitted it has cancelled, since a
+    keyed job may be shared. A job still unfinished but unknown to this queue was cut off
+    by a server restart and reports "interrupted". Submitting with a key (a fingerprint of
+    the input and parameters) returns the existing job for that key while it is queued,
+    running or done — including done jobs left on disk by an earlier server process.
+    """
+
+    def __init__(self, root=JOB_DIR, max_workers: int = 1, warm: bool = True):
+        self.root     = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._pool    = ProcessPoolExecutor(max_workers=max_workers, mp_context=_SPAWN)
+        self._futures = {}
+        self._keys    = {}
+        self._waiting = Counter()          # job id → submitters still waiting on it
+        self._lock    = threading.Lock()   # sessions submit from their own script threads
+        # Spawning a worker and importing scikit-learn takes seconds — do it now, not on submit.
+        # This process needs the same imports to unpickle results, so warm it in a thread too.
+        self._warming = [self._pool.submit(_warm_up) for _ in range(max_workers if warm else 0)]
+        if warm:
+            local = ThreadPoolExecutor(max_workers=1)
+            self._warming.append(local.submit(_warm_up))
+            local.shutdown(wait=False)
+        self.prune()
+        for job_dir in self.root.iterdir():
+            status = _read_status(job_dir) if job_dir.is_dir() else None
+            if status and status["state"] == "done" and status.get("key"):
+                self._keys[status["key"]] = job_dir.name
+
+    def ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the warm-up to finish; True once workers are ready."""
+        return not wait(self._warming, timeout=timeout).not_done
+
+    def submit(self, source, text_col: str, score_col: Optional[str] = None,
+               key: Optional[str] = None, **params) -> str:
+        """Copy source (path or file-like) into a new job and queue run_analysis(**params)."""
+        with self._lock:
+            self.prune()
+            if key is not None and key in self._keys:
+                status = self.status(self._keys[key])
+                if status and status["state"] in ("queued", "running", "done"):
+                    self._waiting[self._keys[key]] += 1
+                    return self._keys[key]
+            return self._submit(source, text_col, score_col, key, params)
+
+    def _submit(self, source, text_col, score_col, key, params) -> str:
+        job_id  = uuid.uuid4().hex[:16]
+        job_dir = self.root / job_id
+        job_dir.mkdir(parents=True)
+        if isinstance(source, (str, os.PathLike)):
+            shutil.copyfile(source, job_dir / INPUT_FILE)
+        else:
+            source.seek(0)
+            with open(job_dir / INPUT_FILE, "wb") as f:
+                shutil.copyfileobj(source, f)
+            source.seek(0)
+
+        _write_status(job_dir, state="queued", stage=None, rows=0, created=time.time(), key=key)
+        self._futures[job_id] = self._pool.submit(_run_job, str(job_dir), text_col, score_col, params)
+        self._waiting[job_id] = 1
+        if key is not None:
+            self._keys[key] = job_id
+        return job_id
+
+    def status(self, job_id: str) -> Optional[dict]:
+        status = _read_status(self.root / job_id)
+        if status is None:
+            return None
+        future = self._futures.get(job_id)
+        if status["state"] not in FINISHED:
+            if future is None:
+                status["state"] = "interrupted"
+            elif future.done() and future.exception() is not None:
+                status.update(state="failed", error=str(future.exception()))   # worker died
+        return status
+
+    def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """Block up to timeout seconds for the job to finish, then return its status."""
+        future = self._futures.get(job_id)
+        if future is not None:
+            wait([future], timeout=timeout)
+        return self.status(job_id)
+
+    def result(self, job_id: str):
+        """The store.Analysis a finished job built (its semantic search has no embedder)."""
+        return pd.read_pickle(self.root / job_id / RESULT_FILE)
+
+    def cancel(self, job_id: str):
+        """Withdraw one submitter; the job itself stops when no submitter is left."""
+        job_dir = self.root / job_id
+        if not job_dir.is_dir():
+            return
+        with self._lock:
+            self._waiting[job_id] -= 1
+            if self._waiting[job_id] > 0:
+                return
+            del self._waiting[job_id]
+        (job_dir / CANCEL_FILE).touch()
+        future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            _write_status(job_dir, state="cancelled")
+
+    def prune(self, max_age: float = JOB_TTL):
+        """Delete jobs (and their files) not updated for max_age seconds.
+
+        Runs on every submit, so a long-lived server keeps about a day of jobs on disk.
+        A job whose worker is still busy with it is never deleted.
+        """
+        now = time.time()
+        for job_dir in self.root.iterdir():
+            future = self._futures.get(job_dir.name)
+            if not job_dir.is_dir() or (future is not None and not future.done()):
+                continue
+            status = _read_status(job_dir)
+            if status is None or now - status.get("updated", 0) > max_age:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                self._futures.pop(job_dir.name, None)
+                self._waiting.pop(job_dir.name, None)
+                if status and self._keys.get(status.get("key")) == job_dir.name:
+                    del self._keys[status["key"]]
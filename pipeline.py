@@ -0,0 +1,899 @@
+"""Data layer for the Review Intelligence app — ingestion, cleaning and topic discovery."""
+
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+# ── INGESTION ─────────────────────────────────────────────────────────────────
+
+PREVIEW_ROWS  = 1_000      # rows parsed for the preview / column picker
+CHUNK_ROWS    = 50_000     # rows per chunk when streaming the full upload
+SCORE_COLUMNS = {"score", "rating", "stars", "rating_score"}
+TEXT_DTYPE    = pd.StringDtype("pyarrow")   # one contiguous buffer per column, no object per review
+TITLE_CHARS   = 80         # a review's Summary, when the data has none, is its first TITLE_CHARS
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def read_preview(source, n_rows: int = PREVIEW_ROWS) -> pd.DataFrame:
+    """Bounded head of a CSV — enough to pick columns without parsing the whole file."""
+    _rewind(source)
+    df = pd.read_csv(source, nrows=n_rows)
+    _rewind(source)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def text_columns(preview_df: pd.DataFrame) -> list:
+    """Columns in the preview sample that hold text."""
+    return [
+        c for c in preview_df.columns
+        if preview_df[c].dtype == object or pd.api.types.is_string_dtype(preview_df[c])
+    ]
+
+
+def detect_score_col(columns) -> Optional[str]:
+    """First column whose name looks like a star rating, if any."""
+    return next((c for c in columns if str(c).strip().lower() in SCORE_COLUMNS), None)
+
+
+def iter_chunks(source, text_col: str, score_col: Optional[str] = None,
+                chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Stream only the text (and score) column of a CSV, chunksize rows at a time."""
+    usecols = [text_col] + ([score_col] if score_col and score_col != text_col else [])
+    _rewind(source)
+    reader = pd.read_csv(
+        source,
+        usecols=lambda c: c.strip() in usecols,
+        dtype={text_col: str},
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        chunk.columns = chunk.columns.str.strip()
+        yield chunk
+
+
+# ── CLEANING ──────────────────────────────────────────────────────────────────
+
+_NON_ALPHA = re.compile(r"[^a-z\s]")
+_SPACES    = re.compile(r"\s+")
+
+_SPAWN = multiprocessing.get_context("spawn")   # safe to start from the threaded Streamlit server
+
+CLEAN_BATCH         = 10_000    # reviews per task sent to a cleaning worker
+PARALLEL_MIN_ROWS   = 50_000    # below this a process pool costs more than it saves
+
+
+def clean_text(t: str) -> str:
+    t = str(t).lower().strip()
+    t = _NON_ALPHA.sub(" ", t)
+    return _SPACES.sub(" ", t).strip()
+
+
+def _clean_batch(texts: list) -> list:
+    return [clean_text(t) for t in texts]
+
+
+def resolve_workers(n_jobs: int) -> int:
+    """n_jobs in joblib convention (-1 = all cores) → a positive worker count."""
+    cores = os.cpu_count() or 1
+    return max(1, cores + 1 + n_jobs if n_jobs < 0 else n_jobs)
+
+
+def clean_texts(texts: list, n_jobs: int = 1, pool: Optional[ProcessPoolExecutor] = None) -> list:
+    """clean_text over a batch — spread across worker processes for large batches.
+
+    Output is identical to [clean_text(t) for t in texts] and in the same order; small
+    batches, or n_jobs=1 without a pool, stay in-process.
+    """
+    if len(texts) < PARALLEL_MIN_ROWS or (pool is None and resolve_workers(n_jobs) == 1):
+        return _clean_batch(texts)
+
+    batches = [texts[i:i + CLEAN_BATCH] for i in range(0, len(texts), CLEAN_BATCH)]
+    if pool is not None:
+        return [t for part in pool.map(_clean_batch, batches) for t in part]
+    with ProcessPoolExecutor(max_workers=resolve_workers(n_jobs), mp_context=_SPAWN) as own_pool:
+        return [t for part in own_pool.map(_clean_batch, batches) for t in part]
+
+
+# ── VECTORIZATION ─────────────────────────────────────────────────────────────
+
+VECTORIZERS = {
+    "auto":       "Auto (by dataset size)",
+    "tfidf":      "TF-IDF (vocabulary)",
+    "hashing":    "Hashed TF-IDF (streaming)",
+    "embeddings": "Sentence embeddings (MiniLM)",
+}
+HASHING_ROWS  = 50_000     # auto: switch from TfidfVectorizer to hashing above this
+HASH_FEATURES = 2 ** 20    # hashed feature space before pruning to max_features
+
+
+class HashedTfidfVectorizer:
+    """Fit-free TF-IDF: feature hashing plus document frequencies counted as chunks stream by.
+
+    Mirrors TfidfVectorizer(max_features, stop_words="english", min_df, max_df): once all
+    chunks are hashed, finalize() keeps the max_features hashed columns with the highest
+    total term count inside the df bounds and applies smoothed IDF + L2 normalisation. There is no
+    vocabulary, so feature_names() rebuilds names for the retained columns only, by
+    hashing the tokens of a sample of documents.
+    """
+
+    def __init__(self, n_features: int = HASH_FEATURES, max_features: int = 2000,
+                 min_df: int = 2, max_df: float = 0.95):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self._hv = HashingVectorizer(
+            n_features=n_features, stop_words="english",
+            alternate_sign=False, norm=None,
+        )
+        self.max_features = max_features
+        self.min_df       = min_df
+        self.max_df       = max_df
+        self.n_docs       = 0
+        self.doc_freq     = np.zeros(n_features, dtype=np.int64)
+        self.term_freq    = np.zeros(n_features, dtype=np.int64)
+        self.columns      = None
+        self.idf          = None
+
+    def _merge(self, X, cols, counts, terms):
+        self.doc_freq[cols]  += counts
+        self.term_freq[cols] += terms
+        self.n_docs         += X.shape[0]
+        return X
+
+    def transform_chunks(self, chunks, n_jobs: int = 1, tick=None):
+        """Hash many chunks (in parallel when n_jobs != 1) and stack the raw counts.
+
+        Each shard comes back with its own document and term frequencies, which are summed
+        here — the parent never rescans the stacked matrix. tick(), if given, is called as
+        each shard is merged; raising from it stops the remaining shards.
+        """
+        import scipy.sparse as sp
+
+        if resolve_workers(n_jobs) == 1 or sum(len(c) for c in chunks) < PARALLEL_MIN_ROWS:
+            parts = (_hash_shard(self._hv, c) for c in chunks)
+        else:
+            from joblib import Parallel, delayed
+            parts = Parallel(n_jobs=n_jobs, return_as="generator")(
+                delayed(_hash_shard)(self._hv, c) for c in chunks
+            )
+        merged = []
+        for part in parts:
+            merged.append(self._merge(*part))
+            if tick is not None:
+                tick()
+        return sp.vstack(merged, format="csr")
+
+    def finalize(self, X_counts):
+        """Prune to the retained columns and turn raw counts into L2-normalised TF-IDF."""
+        from sklearn.preprocessing import normalize
+
+        df   = self.doc_freq
+        ok   = (df >= self.min_df) & (df <= self.max_df * self.n_docs)
+        cand = np.flatnonzero(ok)
+        keep = cand[np.argsort(-self.term_freq[cand], kind="stable")[:self.max_features]]
+        self.columns = np.sort(keep)
+        self.idf     = np.log((1 + self.n_docs) / (1 + df[self.columns])) + 1.0
+
+        X = X_counts[:, self.columns].multiply(self.idf).tocsr()
+        return normalize(X)
+
+    def transform(self, docs):
+        """TF-IDF for new docs with the columns and IDF frozen by finalize()."""
+        from sklearn.preprocessing import normalize
+
+        X = self._hv.transform(docs)[:, self.columns].multiply(self.idf).tocsr()
+        return normalize(X)
+
+    def feature_names(self, sample_docs) -> np.ndarray:
+        """Reverse term map for the retained columns, built from sample_docs.
+
+        Hash collisions resolve to the most frequent token; columns never seen in the
+        sample get an empty name (callers skip those when building labels).
+        """
+        from collections import Counter
+
+        analyzer = self._hv.build_analyzer()
+        freq     = Counter(tok for doc in sample_docs for tok in analyzer(doc))
+        names    = np.full(len(self.columns), "", dtype=object)
+        if not freq:
+            return names
+
+        tokens = sorted(freq, key=freq.get, reverse=True)
+        cols   = self._hv.transform(tokens).indices          # one column per single-token doc
+        pos    = np.searchsorted(self.columns, cols)
+        pos    = np.minimum(pos, len(self.columns) - 1)
+        for tok, p, c in zip(tokens, pos, cols):
+            if self.columns[p] == c and not names[p]:
+                names[p] = tok
+        return names
+
+
+def _hash_shard(hv, docs):
+    """Raw hashed counts of one shard plus its frequencies, as (columns, doc counts, term counts).
+
+    HashingVectorizer output has one entry per (row, column), so counting column
+    occurrences gives document frequency and summing their values gives term frequency.
+    """
+    X = hv.transform(docs)
+    cols, inverse, counts = np.unique(X.indices, return_inverse=True, return_counts=True)
+    terms = np.bincount(inverse, weights=X.data, minlength=len(cols)).astype(np.int64)
+    return X, cols, counts, terms
+
+
+def choose_vectorizer(n_rows: int) -> str:
+    """Vectorizer that avoids a vocabulary pass for corpora over HASHING_ROWS."""
+    return "hashing" if n_rows > HASHING_ROWS else "tfidf"
+
+
+# ── TOPIC VIEW ────────────────────────────────────────────────────────────────
+
+def group_rows(labels, n_groups: int):
+    """One stable argsort of labels → (order, offsets).
+
+    Rows of group i are order[offsets[i]:offsets[i + 1]], in their original order, so
+    per-topic work costs O(n) overall instead of one full scan per topic.
+    """
+    labels  = np.asarray(labels)
+    order   = np.argsort(labels, kind="stable")
+    offsets = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(labels, minlength=n_groups), out=offsets[1:])
+    return order, offsets
+
+
+SAMPLE_SIZE = 15    # sample reviews shown per topic when not searching
+EXCLUDE = {"br", "the", "and", "for", "this", "that", "with", "from", "its", "was", "are", "have"}
+
+
+def keywords(topic_name: str) -> list:
+    """All non-numeric, non-artifact words from an underscore-delimited topic label."""
+    parts = str(topic_name).split("_")
+    return [p for p in parts if not p.isdigit() and len(p) > 1 and p.lower() not in EXCLUDE]
+
+
+def topic_view(topics, scores, topic_ids, n_samples: int = SAMPLE_SIZE, seed: int = 42) -> pd.DataFrame:
+    """Per-topic materialized view, one row per id in topic_ids.
+
+    review_count / avg_score / median_score count only non-missing scores; score_hist
+    holds counts of 1–5 stars. sample_rows are positions *within the topic's reviews*
+    (in original order) — the same rows topic_reviews.sample(n_samples, random_state=seed)
+    would pick — so the dashboard can show them without sampling on every rerun.
+    """
+    topics = np.asarray(topics)
+    scores = np.asarray(scores, dtype=float)
+    order  = np.argsort(topics, kind="stable")
+    ranked = topics[order]
+
+    rows = []
+    for tid in topic_ids:
+        lo, hi  = np.searchsorted(ranked, tid, "left"), np.searchsorted(ranked, tid, "right")
+        n       = int(hi - lo)
+        s       = scores[order[lo:hi]]
+        s       = s[~np.isnan(s)]
+        stars_  = np.clip(np.rint(s), 1, 5).astype(int)
+        rows.append({
+            "topic":        tid,
+            "review_count": len(s),
+            "avg_score":    float(s.mean()) if len(s) else 3.0,
+            "median_score": float(np.median(s)) if len(s) else 3.0,
+            "score_hist":   np.bincount(stars_ - 1, minlength=5).tolist(),
+            "sample_rows":  np.random.RandomState(seed).choice(n, size=min(n_samples, n), replace=False).tolist(),
+        })
+    return pd.DataFrame(rows)
+
+
+def with_topic_view(summaries: pd.DataFrame, topics, scores) -> pd.DataFrame:
+    """summaries (topic_id, topic_name, summary) joined with topic_view and keyword lists."""
+    out  = summaries.reset_index(drop=True)
+    view = topic_view(topics, scores, out["topic_id"].to_numpy())
+    out  = out.join(view)
+    out["keywords"] = out["topic_name"].map(keywords)
+    return out
+
+
+# ── TOPIC DISCOVERY ───────────────────────────────────────────────────────────
+
+CLUSTER_ENGINES = {
+    "auto":      "Auto (by dataset size)",
+    "kmeans":    "Full KMeans",
+    "minibatch": "Mini-batch KMeans",
+    "online":    "Online (partial_fit)",
+    "sharded":   "Sharded KMeans (all cores)",
+}
+MINIBATCH_ROWS = 50_000    # auto: switch from full KMeans to mini-batch above this
+ONLINE_ROWS    = 500_000   # auto: switch to chunked partial_fit (or sharded, with spare cores) above this
+ONLINE_BATCH   = 10_000    # rows per partial_fit / predict call in online mode
+
+
+def choose_engine(n_rows: int, n_workers: int = 1) -> str:
+    """Clustering engine that keeps wall time bounded for a corpus of n_rows."""
+    if n_rows > ONLINE_ROWS:
+        return "sharded" if n_workers > 1 else "online"
+    if n_rows > MINIBATCH_ROWS:
+        return "minibatch"
+    return "kmeans"
+
+
+SHARD_MAX_ITER = 100
+SHARD_TOL      = 1e-4      # as KMeans(tol=...): relative to the mean feature variance
+INIT_SAMPLE    = 20_000    # rows k-means++ seeds from
+
+
+def _shard_bounds(X, n_shards: int) -> list:
+    """Row ranges splitting X into n_shards of about equal work (stored values for sparse X)."""
+    n = X.shape[0]
+    if hasattr(X, "indptr"):
+        cuts = np.searchsorted(X.indptr, np.linspace(0, X.indptr[-1], n_shards + 1)[1:-1])
+    else:
+        cuts = np.linspace(0, n, n_shards + 1)[1:-1].astype(np.int64)
+    bounds = np.unique(np.r_[0, cuts, n])
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def _assign_shard(X, sq_norms, centers, labels):
+    """Lloyd's E-step on one shard, writing labels in place.
+
+    Returns the shard's partial M-step — per-cluster coordinate sums and counts — and
+    how many of its labels changed.
+    """
+    import scipy.sparse as sp
+
+    k    = centers.shape[0]
+    dist = sq_norms[:, None] - 2 * np.asarray(X @ centers.T) + (centers ** 2).sum(axis=1)
+    new  = dist.argmin(axis=1).astype(np.int32)
+    changed = int((new != labels).sum())
+    labels[:] = new
+
+    onehot = sp.csr_matrix((np.ones(len(new)), (new, np.arange(len(new)))), shape=(k, len(new)))
+    sums   = onehot @ X
+    sums   = sums.toarray() if sp.issparse(sums) else np.asarray(sums)
+    return sums, np.bincount(new, minlength=k), changed
+
+
+_shards = {}    # worker side: (root, lo, hi) → (X rows, squared norms, labels)
+
+
+def _load_shard(root: str, lo: int, hi: int):
+    import scipy.sparse as sp
+
+    if (root, lo, hi) not in _shards:
+        mm = lambda name: np.load(os.path.join(root, f"{name}.npy"), mmap_mode="r")
+        if os.path.exists(os.path.join(root, "indptr.npy")):
+            indptr = mm("indptr")
+            a, b   = int(indptr[lo]), int(indptr[hi])
+            X = sp.csr_matrix((mm("data")[a:b], mm("indices")[a:b], np.asarray(indptr[lo:hi + 1]) - a),
+                              shape=(hi - lo, int(mm("shape")[1])))
+        else:
+            X = mm("X")[lo:hi]
+        labels = np.load(os.path.join(root, "labels.npy"), mmap_mode="r+")[lo:hi]
+        _shards[(root, lo, hi)] = (X, np.asarray(mm("sq_norms")[lo:hi]), labels)
+    return _shards[(root, lo, hi)]
+
+
+def _shard_step(root: str, lo: int, hi: int, centers):
+    """Worker entry point — one E-step over rows lo:hi of the memory-mapped matrix."""
+    X, sq_norms, labels = _load_shard(root, lo, hi)
+    return _assign_shard(X, sq_norms, centers, labels)
+
+
+def _limit_threads():
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)     # one BLAS thread per worker — the shards are the parallelism
+
+
+def fit_sharded(X, n_clusters: int, n_jobs: int = -1, max_iter: int = SHARD_MAX_ITER,
+                tol: float = SHARD_TOL, seed: int = 42, tick=None):
+    """Lloyd's KMeans with X split into row shards across worker processes.
+
+    X is written once to memory-mapped .npy files that every worker maps (the OS shares
+    the pages), so an iteration ships only the centroids out and k × d partial sums
+    back: each worker assigns its shard's rows to the nearest centroid and returns
+    per-cluster sums and counts, and the parent reduces them into the new centroids.
+    Seeding is k-means++ on a fixed sample, so the result does not depend on the number
+    of workers. tick(), if given, is called after every iteration. Returns (labels,
+    cluster_centers) like fit_clusters.
+    """
+    import scipy.sparse as sp
+    from sklearn.cluster import kmeans_plusplus
+
+    rng      = np.random.default_rng(seed)
+    n        = X.shape[0]
+    sample   = np.sort(rng.choice(n, size=min(n, INIT_SAMPLE), replace=False))
+    centers, _ = kmeans_plusplus(X[sample], n_clusters, random_state=seed)
+    centers  = np.asarray(centers, dtype=np.float64)
+
+    if sp.issparse(X):
+        X        = X.tocsr()
+        sq_norms = np.asarray(X.multiply(X).sum(axis=1)).ravel()
+        variance = np.asarray(X.multiply(X).mean(axis=0)).ravel() - np.asarray(X.mean(axis=0)).ravel() ** 2
+    else:
+        X        = np.asarray(X)
+        sq_norms = (X.astype(np.float64) ** 2).sum(axis=1)
+        variance = X.var(axis=0)
+    tol_abs = tol * float(np.mean(variance))
+    workers = min(resolve_workers(n_jobs), n)
+    shards  = _shard_bounds(X, workers)
+
+    with tempfile.TemporaryDirectory(prefix="kmeans-") as root:
+        labels = np.lib.format.open_memmap(os.path.join(root, "labels.npy"), mode="w+", dtype=np.int32, shape=(n,))
+        labels[:] = -1
+        if workers > 1:
+            arrays = {"sq_norms": sq_norms}
+            if sp.issparse(X):
+                arrays.update(data=X.data, indices=X.indices, indptr=X.indptr, shape=np.array(X.shape))
+            else:
+                arrays["X"] = X
+            for name, arr in arrays.items():
+                np.save(os.path.join(root, f"{name}.npy"), arr)
+            pool = ProcessPoolExecutor(workers, mp_context=_SPAWN, initializer=_limit_threads)
+            step = lambda c: pool.map(_shard_step, *zip(*[(root, lo, hi, c) for lo, hi in shards]))
+        else:
+            pool = None
+            step = lambda c: [_assign_shard(X, sq_norms, c, labels)]
+
+        try:
+            for _ in range(max_iter):
+                parts   = list(step(centers))
+                if tick is not None:
+                    tick()
+                sums    = sum(p[0] for p in parts)
+                counts  = sum(p[1] for p in parts)
+                if sum(p[2] for p in parts) == 0:        # no label moved — converged
+                    break
+                new = centers.copy()
+                nonempty = counts > 0                     # an empty cluster keeps its centroid
+                new[nonempty] = sums[nonempty] / counts[nonempty, None]
+                shift, centers = float(((new - centers) ** 2).sum()), new
+                if shift <= tol_abs:
+                    list(step(centers))                  # final E-step so labels match the centroids
+                    break
+            else:
+                list(step(centers))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return np.array(labels), centers
+
+
+def fit_clusters(X, n_clusters: int, engine: str = "auto", n_jobs: int = 1, tick=None):
+    """Cluster the rows of X. Returns (labels, cluster_centers).
+
+    The sharded and online engines call tick(), if given, after every iteration or
+    batch; raising from it abandons the fit.
+    """
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    n_rows = X.shape[0]
+    if engine == "auto":
+        engine = choose_engine(n_rows, resolve_workers(n_jobs))
+
+    if engine == "sharded":
+        return fit_sharded(X, n_clusters, n_jobs, tick=tick)
+
+    if engine == "kmeans":
+        km = KMeans(n_clusters=n_clusters, random_state=42, n_init="auto")
+        return km.fit_predict(X), km.cluster_centers_
+
+    if engine == "minibatch":
+        km = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, n_init="auto", batch_size=4096)
+        return km.fit_predict(X), km.cluster_centers_
+
+    if engine == "online":
+        # Shuffle once so each chunk is a fair sample even if the input is sorted
+        km    = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, batch_size=ONLINE_BATCH)
+        perm  = np.random.default_rng(42).permutation(n_rows)
+        first = max(ONLINE_BATCH, n_clusters)
+        km.partial_fit(X[perm[:first]])
+        for start in range(first, n_rows, ONLINE_BATCH):
+            if tick is not None:
+                tick()
+            km.partial_fit(X[perm[start:start + ONLINE_BATCH]])
+        labels = []
+        for start in range(0, n_rows, ONLINE_BATCH):
+            if tick is not None:
+                tick()
+            labels.append(km.predict(X[start:start + ONLINE_BATCH]))
+        return np.concatenate(labels), km.cluster_centers_
+
+    raise ValueError(f"Unknown clustering engine: {engine!r}")
+
+
+PIPELINE_VERSION = "6"     # bump whenever a stage's output changes, to invalidate cached results
+STAGES = ("clean", "vectorize", "cluster", "summarize")    # reported to run_analysis(progress=...)
+
+log = logging.getLogger("pipeline")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water resident memory of this process so far, in MB (None on Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024    # bytes on macOS, KB elsewhere
+
+
+class StageLog:
+    """Rows, wall time and memory for each stage of one run_analysis call.
+
+    start() closes the running stage and opens the next; every change is passed to
+    progress(stage, rows, stages) with the finished stages so far, and each finished
+    stage is logged as one JSON line on the "pipeline" logger. peak_rss_mb is the
+    process high-water mark when the stage ended — it rose during the stage only if
+    rss_growth_mb > 0. Both are None where the platform cannot report it.
+    """
+
+    def __init__(self, progress=None):
+        self.stages   = []
+        self.progress = progress
+        self._current = None
+
+    def start(self, stage: str, rows: int = 0, cached: bool = False):
+        self.finish()
+        self._current = {"stage": stage, "rows": rows, "cached": cached,
+                         "_t0": time.perf_counter(), "_rss0": peak_rss_mb()}
+        self._emit()
+
+    def rows(self, rows: int):
+        self._current["rows"] = rows
+        self._emit()
+
+    def tick(self):
+        """Report the running stage again — lets progress() abort a long loop within it."""
+        self._emit()
+
+    def finish(self):
+        if self._current is None:
+            return
+        cur, self._current = self._current, None
+        peak = peak_rss_mb()
+        rss  = peak is not None
+        record = {
+            "stage":         cur["stage"],
+            "rows":          cur["rows"],
+            "cached":        cur["cached"],
+            "seconds":       round(time.perf_counter() - cur["_t0"], 4),
+            "peak_rss_mb":   round(peak, 1) if rss else None,
+            "rss_growth_mb": round(peak - cur["_rss0"], 1) if rss else None,
+        }
+        self.stages.append(record)
+        log.info(json.dumps(record))
+
+    def close(self):
+        """Finish the last stage and report "done"."""
+        self.finish()
+        self._emit()
+
+    def _emit(self):
+        if self.progress is not None:
+            cur = self._current
+            self.progress(cur["stage"] if cur else "done", cur["rows"] if cur else 0, list(self.stages))
+
+
+def _ingest(chunks, text_col: str, n_jobs: int, stages: Optional[StageLog] = None,
+            score_col: Optional[str] = None):
+    """Stage 1 — stream chunks into one frame (text and score columns only) and their cleaned text.
+
+    score_col defaults to the column detect_score_col finds in each chunk.
+    """
+    frames, cleaned = [], []
+    workers = resolve_workers(n_jobs)
+    pool    = ProcessPoolExecutor(workers, mp_context=_SPAWN) if workers > 1 else None
+    try:
+        for chunk in chunks:
+            score = score_col or detect_score_col(chunk.columns)
+            keep  = [text_col] + ([score] if score and score != text_col else [])
+            chunk = chunk[keep].assign(**{text_col: chunk[text_col].fillna("").astype(TEXT_DTYPE)})
+            cleaned.extend(clean_texts(chunk[text_col].tolist(), pool=pool))
+            frames.append(chunk)
+            if stages is not None:
+                stages.rows(len(cleaned))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if not frames:
+        raise ValueError("No rows to analyze.")
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return df, cleaned
+
+
+def _vectorize(cleaned: list, vectorizer: str, n_jobs: int, embedder=None, tick=None):
+    """Stage 2 — cleaned text → (L2-normalised document matrix, fitted vectorizer).
+
+    Sentence embeddings have no vocabulary, so that path returns None for the vectorizer.
+    The hashing and embedding paths call tick(), if given, between chunks.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    if vectorizer == "embeddings":
+        if embedder is None:
+            from embeddings import EmbeddingEngine
+            embedder = EmbeddingEngine(n_workers=resolve_workers(n_jobs))
+        if tick is None:
+            return embedder.encode(cleaned), None
+        parts = []
+        for start in range(0, len(cleaned), CHUNK_ROWS):
+            tick()
+            parts.append(embedder.encode(cleaned[start:start + CHUNK_ROWS]))
+        return np.concatenate(parts), None
+    if vectorizer == "hashing":
+        vec = HashedTfidfVectorizer(max_features=2000, min_df=2, max_df=0.95)
+        batches = [cleaned[i:i + CHUNK_ROWS] for i in range(0, len(cleaned), CHUNK_ROWS)]
+        return vec.finalize(vec.transform_chunks(batches, n_jobs=n_jobs, tick=tick)), vec
+    if vectorizer == "tfidf":
+        vec = TfidfVectorizer(max_features=2000, stop_words="english", min_df=2, max_df=0.95)
+        return vec.fit_transform(cleaned), vec
+    raise ValueError(f"Unknown vectorizer: {vectorizer!r}")
+
+
+SUMMARY_MODES = {
+    "auto":       "Auto (by dataset size)",
+    "extractive": "Extractive (central sentences)",
+    "sample":     "First reviews",
+}
+EXTRACTIVE_ROWS = 10_000    # auto: extractive summaries above this; BART stays a click away
+
+
+def choose_summary(n_rows: int) -> str:
+    return "extractive" if n_rows > EXTRACTIVE_ROWS else "sample"
+
+
+def _summarize(texts: pd.Series, scores: np.ndarray, cleaned: list, X, vec, labels, centers,
+               n_clusters: int, summary: str = "sample") -> pd.DataFrame:
+    """Stage 3b — per-topic names and summaries, joined with the topic view.
+
+    summary="extractive" picks central, non-redundant sentences (summarize.extractive_summaries);
+    "sample" joins the first four reviews of each topic.
+    """
+    order, offsets = group_rows(labels, n_clusters)
+
+    if vec is None:
+        # Embedding dimensions carry no words — label topics by their mean TF-IDF instead
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        import scipy.sparse as sp
+
+        vec    = TfidfVectorizer(max_features=2000, stop_words="english", min_df=2, max_df=0.95)
+        X      = vec.fit_transform(cleaned)
+        member = sp.csr_matrix(
+            (np.ones(len(labels)), (labels, np.arange(len(labels)))), shape=(n_clusters, len(labels)),
+        )
+        counts  = np.maximum(np.diff(offsets), 1)[:, None]
+        centers = np.asarray((member @ X).todense()) / counts
+
+    centroids = centers.argsort()[:, ::-1]
+    if isinstance(vec, HashedTfidfVectorizer):
+        # Name only the retained columns, from a bounded sample of each topic's reviews
+        terms = vec.feature_names(
+            cleaned[j] for i in range(n_clusters) for j in order[offsets[i]:offsets[i + 1]][:500]
+        )
+    else:
+        terms = vec.get_feature_names_out()
+
+    if summary == "extractive":
+        from summarize import extractive_summaries
+        summaries = extractive_summaries(texts.to_numpy(), X, vec, centers, order, offsets)
+    elif summary == "sample":
+        summaries = []
+        for i in range(n_clusters):
+            text = " ".join(texts.iat[j] for j in order[offsets[i]:offsets[i + 1]][:4])
+            summaries.append(text[:600] + "…" if len(text) > 600 else text)
+    else:
+        raise ValueError(f"Unknown summary mode: {summary!r}")
+
+    rows = []
+    for i in range(n_clusters):
+        top_kws    = [terms[j] for j in centroids[i] if terms[j]][:5]
+        topic_name = f"{i}_" + "_".join(top_kws[:4])
+        rows.append({"topic_id": i, "topic_name": topic_name, "summary": summaries[i]})
+    return with_topic_view(pd.DataFrame(rows), labels, scores)
+
+
+def _scores(df: pd.DataFrame, score_col: Optional[str] = None) -> np.ndarray:
+    """Star rating per row (missing / no score column → 3.0); score_col defaults as in _ingest."""
+    score_col = score_col or detect_score_col(df.columns)
+    if not score_col:
+        return np.full(len(df), 3.0)
+    return pd.to_numeric(df[score_col], errors="coerce").fillna(3.0).to_numpy(dtype=float)
+
+
+def _finish(df: pd.DataFrame, text_col: str, labels, scores) -> pd.DataFrame:
+    """The reviews frame handed back — topic, Score and Text, each in its narrowest dtype.
+
+    Text is the ingested column itself, not a copy; Summary is not stored, as it is only
+    a prefix of Text (see review_titles).
+    """
+    return pd.DataFrame({
+        "topic": np.asarray(labels, dtype=np.int16),
+        "Score": np.asarray(scores, dtype=np.float32),
+        "Text":  df[text_col].reset_index(drop=True),
+    })
+
+
+def review_titles(reviews: pd.DataFrame) -> pd.Series:
+    """Each review's Summary — the column when the data has one, else the start of its Text."""
+    if "Summary" in reviews:
+        return reviews["Summary"]
+    return reviews["Text"].str.slice(0, TITLE_CHARS)
+
+
+def run_analysis(data: Union[pd.DataFrame, Iterable[pd.DataFrame]], text_col: str, n_topics: int,
+                 engine: str = "auto", vectorizer: str = "auto", n_jobs: int = 1,
+                 cache=None, data_key: Optional[str] = None, embedder=None,
+                 summary: str = "auto", progress=None, return_model: bool = False,
+                 score_col: Optional[str] = None):
+    """TF-IDF + KMeans topic discovery. Returns (summaries_df, reviews_df).
+
+    reviews_df is one row per input review: topic (int16), Score (float32) and Text.
+
+    data is either a DataFrame or an iterable of chunks (see iter_chunks); chunks are
+    cleaned as they arrive so the raw upload never has to be held in memory at once.
+    engine is one of CLUSTER_ENGINES and vectorizer one of VECTORIZERS; "auto" picks
+    by row count. n_jobs (-1 = all cores) parallelises cleaning and the hashing
+    vectorizer across worker processes for large inputs. vectorizer="embeddings"
+    encodes with embedder (default: embeddings.EmbeddingEngine), whose own on-disk
+    store means overlapping datasets only embed their new reviews. summary is one of
+    SUMMARY_MODES; "auto" switches to extractive summaries for large inputs. score_col
+    names the star-rating column; by default it is detected by name (detect_score_col).
+
+    With a cache (see cache.ResultCache) and a data_key identifying the input bytes,
+    each stage is looked up before it runs: cleaning is reused across topic counts and
+    engines, vectors across topic counts, and a repeat of the same request is a load.
+
+    progress(stage, rows, stages), if given, is called as each of STAGES starts, after
+    every cleaned chunk, between the chunks and iterations of vectorizing and clustering,
+    and once more with stage "done"; stages lists the finished ones with their rows,
+    seconds and peak memory (see StageLog). Raising from it aborts the run.
+    return_model=True also returns the fitted TopicModel, which assigns later reviews to
+    these topics without refitting: (summaries_df, reviews_df, model).
+    """
+    chunks    = [data] if isinstance(data, pd.DataFrame) else data
+    use_cache = cache is not None and data_key is not None
+    base      = (PIPELINE_VERSION, data_key, text_col, score_col)
+
+    def cached(stage, *parts):
+        return cache.load(cache.key(*base, stage, *parts)) if use_cache else None
+
+    def store(stage, *parts, **items):
+        if use_cache:
+            cache.save(cache.key(*base, stage, *parts), **items)
+
+    stages = StageLog(progress)
+
+    hit = cached("clean")
+    stages.start("clean", len(hit["cleaned"]) if hit else 0, cached=bool(hit))
+    if hit:
+        df, cleaned = hit["frame"], hit["cleaned"]
+    else:
+        df, cleaned = _ingest(chunks, text_col, n_jobs, stages, score_col)
+        store("clean", frame=df, cleaned=cleaned)
+
+    n_clusters = min(n_topics, max(2, len(df) // 10))
+    if vectorizer == "auto":
+        vectorizer = choose_vectorizer(len(df))
+    if engine == "auto":
+        engine = choose_engine(len(df), resolve_workers(n_jobs))
+    if summary == "auto":
+        summary = choose_summary(len(df))
+
+    scores = _scores(df, score_col)
+
+    hit = cached("clusters", vectorizer, engine, n_clusters, summary)
+    if hit:
+        stages.start("summarize", len(df), cached=True)
+        labels, centers, vec, sum_df = hit["labels"], hit["centers"], hit["vectorizer"], hit["summaries"]
+    else:
+        hit = cached("vectors", vectorizer)
+        stages.start("vectorize", len(df), cached=bool(hit))
+        if hit:
+            X, vec = hit["X"], hit["vectorizer"]
+        else:
+            X, vec = _vectorize(cleaned, vectorizer, n_jobs, embedder, tick=stages.tick)
+            store("vectors", vectorizer, X=X, vectorizer=vec)
+
+        stages.start("cluster", len(df))
+        labels, centers = fit_clusters(X, n_clusters, engine, n_jobs, tick=stages.tick)
+        stages.start("summarize", len(df))
+        sum_df = _summarize(df[text_col], scores, cleaned, X, vec, labels, centers, n_clusters, summary)
+        store("clusters", vectorizer, engine, n_clusters, summary,
+              labels=labels, centers=centers, vectorizer=vec, summaries=sum_df)
+
+    df = _finish(df, text_col, labels, scores)
+    stages.close()
+    if return_model:
+        return sum_df, df, TopicModel(vectorizer, vec, centers, sum_df, text_col, labels, scores)
+    return sum_df, df
+
+
+# ── INCREMENTAL ASSIGNMENT ────────────────────────────────────────────────────
+
+ASSIGN_BATCH = 10_000     # rows per nearest-centroid call
+
+
+class TopicModel:
+    """A fitted run_analysis — vectorizer, cluster centres and topic summaries.
+
+    assign() puts new reviews into the existing topics with the frozen vectorizer and a
+    nearest-centroid lookup (what KMeans.predict does), then refreshes the topic view of
+    only the topics that received rows. Names, keywords and summaries stay as fitted, so
+    a daily drop costs one cleaning + transform pass over the new rows, not a recluster.
+    labels / scores cover every review assigned so far, in arrival order.
+    """
+
+    def __init__(self, vectorizer: str, vec, centers, summaries: pd.DataFrame, text_col: str,
+                 labels, scores):
+        self.vectorizer = vectorizer
+        self.vec        = vec
+        self.centers    = np.asarray(centers)
+        self.summaries  = summaries.reset_index(drop=True).copy()
+        self.text_col   = text_col
+        self.labels     = np.asarray(labels, dtype=np.int32)
+        self.scores     = np.asarray(scores, dtype=np.float32)
+
+    def transform(self, cleaned: list, embedder=None):
+        if self.vectorizer == "embeddings":
+            if embedder is None:
+                from embeddings import EmbeddingEngine
+                embedder = EmbeddingEngine()
+            return embedder.encode(cleaned)
+        return self.vec.transform(cleaned)
+
+    def predict(self, cleaned: list, embedder=None) -> np.ndarray:
+        """Topic of each cleaned review — the nearest cluster centre."""
+        from sklearn.metrics import pairwise_distances_argmin
+
+        X = self.transform(cleaned, embedder)
+        if X.shape[0] == 0:
+            return np.array([], dtype=np.int32)
+        return np.concatenate([
+            pairwise_distances_argmin(X[start:start + ASSIGN_BATCH], self.centers)
+            for start in range(0, X.shape[0], ASSIGN_BATCH)
+        ]).astype(np.int32)
+
+    def assign(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], text_col: Optional[str] = None,
+               n_jobs: int = 1, embedder=None, score_col: Optional[str] = None):
+        """Assign new reviews to the fitted topics. Returns (summaries_df, reviews_df).
+
+        reviews_df has the same columns run_analysis returns; summaries_df is the updated
+        topic table (self.summaries, refreshed in place for the topics that grew).
+        score_col is detected by name when not given, as in run_analysis.
+        """
+        text_col    = text_col or self.text_col
+        chunks      = [data] if isinstance(data, pd.DataFrame) else data
+        df, cleaned = _ingest(chunks, text_col, n_jobs, score_col=score_col)
+        labels      = self.predict(cleaned, embedder)
+        scores      = _scores(df, score_col)
+
+        self.labels = np.concatenate([self.labels, labels])
+        self.scores = np.concatenate([self.scores, scores.astype(np.float32)])
+        self._refresh(np.unique(labels))
+        return self.summaries, _finish(df, text_col, labels, scores)
+
+    def _refresh(self, topic_ids):
+        view = topic_view(self.labels, self.scores, topic_ids)
+        pos  = pd.Index(self.summaries["topic_id"]).get_indexer(view["topic"])
+        for row, (_, stats) in zip(pos, view.iterrows()):
+            for col, value in stats.items():
+                self.summaries.at[row, col] = value
+
+    def save(self, path):
+        pd.to_pickle(self, path)
+
+    @staticmethod
+    def load(path) -> "TopicModel":
+        return pd.read_pickle(path)
@@ -0,0 +1,147 @@
+"""Per-topic inverted index behind the dashboard's "Search within reviews" box."""
+
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from pipeline import clean_text
+
+_TOKEN_QUERY    = re.compile(r"^[A-Za-z\s]+$")
+MAX_TOKEN_CHARS = 40     # longer runs of letters are not indexed; "auto" falls back to a scan to find them
+INDEX_BLOCK     = 50_000 # reviews tokenised at a time while building
+
+
+class ReviewIndex:
+    """Token → review postings, one compressed table per topic.
+
+    Terms are integer codes into one sorted vocabulary, so memory follows the number of
+    distinct terms and not rows × longest token. Each topic holds its sorted term codes
+    plus CSR-style offsets into a row array: a prefix is a code range found by binary
+    search in the vocabulary, and a query never touches reviews outside its topic.
+    Rows are positions *within the topic* (its reviews in original order), matching
+    TopicStore.topic(tid) and the topic view's sample_rows — use topic_reviews.iloc[rows].
+    The text itself is not copied: substring searches read reviews_df[text_col]. The
+    build tokenises INDEX_BLOCK rows at a time with Arrow string kernels and keeps one
+    int64 key per posting, so its peak memory stays near 16 bytes per token.
+    """
+
+    def __init__(self, reviews_df: pd.DataFrame, text_col: str = "Text", topic_col: str = "topic"):
+        self._reviews  = reviews_df
+        self._text_col = text_col
+        topics       = reviews_df[topic_col].to_numpy()
+        self._topics = {}
+
+        # Global row → (topic, position within topic), from one stable sort
+        order  = np.argsort(topics, kind="stable")
+        ranked = topics[order]
+        ids, starts = np.unique(ranked, return_index=True)
+        ends   = np.r_[starts[1:], len(ranked)]
+        local  = np.empty(len(topics), dtype=np.int64)
+        for a, b in zip(starts, ends):
+            local[order[a:b]] = np.arange(b - a)
+
+        # Tokenise a block of rows at a time: only int32 codes and rows outlive a block
+        n      = len(topics)
+        blocks = []
+        for lo in range(0, n, INDEX_BLOCK):
+            text  = pa.array(reviews_df[text_col].iloc[lo:lo + INDEX_BLOCK].fillna("").astype(str))
+            # Only ASCII letters and spaces survive the replace, so the ASCII split is exact
+            words = pc.ascii_split_whitespace(
+                pc.replace_substring_regex(pc.utf8_lower(text), r"[^a-z\s]", " ")
+            )
+            flat   = pc.list_flatten(words)
+            length = pc.utf8_length(flat)
+            keep   = pc.and_(pc.greater(length, 0), pc.less_equal(length, MAX_TOKEN_CHARS))
+            terms  = pc.dictionary_encode(flat.filter(keep))
+            parent = pc.list_parent_indices(words).filter(keep).to_numpy().astype(np.int32) + lo
+            blocks.append((terms.dictionary, terms.indices.to_numpy(), parent))
+
+        vocab = pc.unique(pa.chunked_array([d for d, _, _ in blocks])) if blocks else pa.array([], pa.string())
+        vocab = vocab.take(pc.array_sort_indices(vocab))
+        self._vocab = np.asarray(vocab.to_pylist(), dtype=object)
+
+        # One int64 key per posting — (topic rank, term, local row) — sorted and deduplicated at once
+        n_vocab = max(len(vocab), 1)
+        n_local = max(int(np.max(ends - starts)) if len(ids) else 0, 1)
+        rank    = np.empty(n, dtype=np.int64)
+        for r, (a, b) in enumerate(zip(starts, ends)):
+            rank[order[a:b]] = r
+        keys = []
+        for dictionary, codes, parent in blocks:
+            remap = pc.index_in(dictionary, value_set=vocab).to_numpy().astype(np.int64)
+            keys.append((rank[parent] * n_vocab + remap[codes]) * n_local + local[parent])
+        del blocks
+        keys = np.concatenate(keys) if keys else np.array([], np.int64)
+        keys.sort()
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) else keys
+
+        rows      = (keys % n_local).astype(np.int32)
+        keys    //= n_local
+        term_of   = (keys % n_vocab).astype(np.int32)
+        bounds    = np.searchsorted(keys // n_vocab, np.arange(len(ids) + 1))
+        for r, (tid, a, b) in enumerate(zip(ids.tolist(), starts, ends)):
+            lo, hi = bounds[r], bounds[r + 1]
+            terms, first = np.unique(term_of[lo:hi], return_index=True)
+            offsets = np.append(first, hi - lo).astype(np.int64)
+            self._topics[tid] = (terms, offsets, rows[lo:hi], order[a:b])   # last: local → global
+
+    # ── lookups ──────────────────────────────────────────────────────────────
+
+    def _postings(self, topic, term: str, prefix: bool) -> np.ndarray:
+        terms, offsets, rows, _ = self._topics[topic]
+        first = np.searchsorted(self._vocab, term, side="left")
+        last  = np.searchsorted(self._vocab, term + "{", side="left") if prefix else \
+                np.searchsorted(self._vocab, term, side="right")
+        lo, hi = np.searchsorted(terms, first), np.searchsorted(terms, last)
+        if hi <= lo:
+            return rows[:0]
+        if hi - lo == 1:
+            return rows[offsets[lo]:offsets[lo + 1]]
+        return np.unique(rows[offsets[lo]:offsets[hi]])
+
+    def _substring(self, topic, *needles: str) -> np.ndarray:
+        all_rows = self._topics[topic][3]
+        text = self._reviews[self._text_col].iloc[all_rows]
+        mask = np.ones(len(all_rows), dtype=bool)
+        for needle in needles:
+            mask &= text.str.contains(needle, case=False, na=False, regex=False).to_numpy()
+        return np.flatnonzero(mask)
+
+    def search(self, topic, query: str, prefix: bool = True, mode: str = "auto") -> np.ndarray:
+        """Positions within topic of the reviews whose text contains every query term.
+
+        mode="token" ANDs the cleaned query terms (each treated as a prefix unless
+        prefix=False); mode="substring" is a plain case-insensitive scan. "auto" uses
+        the index whenever the query is made of plain words and falls back otherwise,
+        or when the index finds nothing (a term may only occur inside an unindexed
+        token longer than MAX_TOKEN_CHARS).
+        """
+        query = query.strip()
+        if topic not in self._topics:
+            return np.array([], dtype=np.int64)
+        if not query:
+            return np.arange(len(self._topics[topic][3]))
+
+        terms = sorted(set(clean_text(query).split()), key=len, reverse=True)
+        if mode == "substring" or (mode == "auto" and not _TOKEN_QUERY.match(query)) or \
+           (mode == "auto" and terms and len(terms[0]) > MAX_TOKEN_CHARS):
+            return self._substring(topic, query)
+
+        hits = None
+        for term in terms:
+            rows = self._postings(topic, term, prefix)
+            hits = rows if hits is None else np.intersect1d(hits, rows, assume_unique=True)
+            if len(hits) == 0:
+                break
+        if hits is None:
+            return np.arange(len(self._topics[topic][3]))
+        if len(hits) == 0 and mode == "auto":
+            return self._substring(topic, *terms)
+        return hits
+
+    def count(self, topic, query: str, prefix: bool = True, mode: str = "auto") -> int:
+        """Number of reviews in topic matching query."""
+        return len(self.search(topic, query, prefix=prefix, mode=mode))
@@ -0,0 +1,275 @@
+"""In-memory review stores used by the dashboard."""
+
+import os
+import re
+import sys
+import threading
+import weakref
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ann import IVFIndex, SemanticSearch
+from pipeline import clean_texts, review_titles
+from search import ReviewIndex
+
+
+class TopicStore:
+    """Reviews sorted by topic once, plus an offsets table.
+
+    topic(tid) is a positional slice of the sorted frame — no boolean mask, no copy —
+    so switching topics costs the same however many reviews the dataset holds. Rows
+    keep their original relative order inside each topic, so topic-local positions
+    (sample_rows, search hits) mean the same thing here as on a masked frame. order
+    maps each row id back to its position in reviews_df.
+    """
+
+    def __init__(self, reviews_df: pd.DataFrame, topic_col: str = "topic"):
+        topics = reviews_df[topic_col].to_numpy()
+        order  = np.argsort(topics, kind="stable")
+        self.order = order
+        self.frame = reviews_df.iloc[order].reset_index(drop=True)
+
+        ranked = topics[order]
+        ids, starts = np.unique(ranked, return_index=True)
+        ends = np.r_[starts[1:], len(ranked)]
+        self._bounds = {tid: (int(a), int(b)) for tid, a, b in zip(ids.tolist(), starts, ends)}
+
+    def topic(self, tid) -> pd.DataFrame:
+        lo, hi = self._bounds.get(tid, (0, 0))
+        return self.frame.iloc[lo:hi]
+
+    def rows(self, row_ids) -> pd.DataFrame:
+        """Reviews by row id (position in the sorted frame), in the order given."""
+        return self.frame.iloc[np.asarray(row_ids, dtype=np.int64)]
+
+    @property
+    def topics(self) -> list:
+        return list(self._bounds)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+
+# ── DISPLAY COLUMNS ───────────────────────────────────────────────────────────
+
+_HTML_TAG  = re.compile(r"<.*?>")
+_BARE_URL  = re.compile(r"http\S+")
+_SPACE_RUN = re.compile(r"\s+")
+
+
+def strip_html_series(texts: pd.Series) -> pd.Series:
+    """Remove HTML tags and bare URLs from a column of review text, collapsing whitespace."""
+    return (
+        texts.fillna("").astype(str)    # pattern strings, not compiled objects, so Arrow can run them
+        .str.replace(_HTML_TAG.pattern, "", regex=True)
+        .str.replace(_BARE_URL.pattern, "", regex=True)
+        .str.replace(_SPACE_RUN.pattern, " ", regex=True)
+        .str.strip()
+    )
+
+
+STAR_STRINGS = ["★" * n + "☆" * (5 - n) for n in range(1, 6)]
+
+
+def stars_series(scores: pd.Series) -> pd.Series:
+    """Star string per score (missing scores count as 3), as a 5-category column."""
+    n = pd.to_numeric(scores, errors="coerce").fillna(3.0).round().clip(1, 5).astype(int)
+    return pd.Series(pd.Categorical.from_codes(n.to_numpy() - 1, STAR_STRINGS), index=scores.index)
+
+
+def with_display_columns(reviews: pd.DataFrame) -> pd.DataFrame:
+    """reviews with their card text — stripped title and body, star string — in place of Text.
+
+    Run once when a dataset is loaded, so rendering a page only slices these columns.
+    body replaces Text and title replaces Summary: the dashboard keeps one copy of each
+    review's text, and searches and renders that copy.
+    """
+    title = strip_html_series(review_titles(reviews))
+    return reviews.drop(columns=["Text", "Summary"], errors="ignore").assign(
+        title = title.mask(title == "", "—"),
+        body  = strip_html_series(reviews["Text"]),
+        stars = stars_series(reviews["Score"]),
+    )
+
+
+# ── SHARED ANALYSES ───────────────────────────────────────────────────────────
+
+ANALYSIS_MEMORY = int(os.environ.get("REVIEW_ANALYSIS_MB", 1024)) << 20   # resident analyses, bytes
+SPILL_DIR       = Path(os.environ.get("REVIEW_SPILL_DIR", Path(__file__).parent / ".cache" / "analyses"))
+
+
+def deep_nbytes(obj, _seen=None) -> int:
+    """Approximate bytes held by obj — pandas and numpy buffers, containers and attributes."""
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(deep_nbytes(k, _seen) + deep_nbytes(v, _seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sum(deep_nbytes(v, _seen) for v in obj)
+    if hasattr(obj, "__dict__") and not isinstance(obj, type):
+        return deep_nbytes(vars(obj), _seen)
+    return sys.getsizeof(obj)
+
+
+class Analysis:
+    """One upload's results as the dashboard serves them.
+
+    reviews is a TopicStore; index and semantic are its keyword and (optional) ANN
+    search. The shared embedder behind semantic is not counted in nbytes.
+    """
+
+    def __init__(self, summaries: pd.DataFrame, reviews: TopicStore, index, model, semantic=None):
+        self.summaries = summaries
+        self.reviews   = reviews
+        self.index     = index
+        self.model     = model
+        self.semantic  = semantic
+        # One traversal, so the frame the index references is counted once
+        self.nbytes    = deep_nbytes((summaries, reviews.frame, index, getattr(semantic, "index", None)))
+
+    def vectors(self) -> Optional[np.ndarray]:
+        """The semantic index's vector for each review, in row-id order (None without one)."""
+        if self.semantic is None:
+            return None
+        index   = self.semantic.index
+        vectors = np.empty((len(index), index.vectors.shape[1]), dtype=index.vectors.dtype)
+        vectors[np.asarray(index.ids)] = index.vectors
+        return vectors
+
+
+def build_analysis(summaries: pd.DataFrame, reviews_df: pd.DataFrame, model, vectors=None,
+                   embedder=None) -> Analysis:
+    """Index a run_analysis result the way the dashboard serves it.
+
+    An embeddings model also gets semantic search over vectors, one per reviews_df row —
+    by default looked up by embedder from the Text column, before the display columns
+    replace it. embedder also answers the semantic search's free-text queries.
+    """
+    if model.vectorizer == "embeddings" and vectors is None:
+        # Vectors are already in the embedding store — this is a lookup, not a re-embed
+        vectors = embedder.encode(clean_texts(reviews_df["Text"].tolist()))
+    if "body" not in reviews_df:
+        reviews_df = with_display_columns(reviews_df)
+    reviews  = TopicStore(reviews_df)
+    semantic = None
+    if vectors is not None:
+        semantic = SemanticSearch(IVFIndex.build(vectors[reviews.order]), embedder)
+    return Analysis(summaries, reviews, ReviewIndex(reviews.frame, text_col="body"), model, semantic)
+
+
+class AnalysisHandle:
+    """A session's reference to a shared analysis — the reference is released when it is collected."""
+
+    def __init__(self, store: "AnalysisStore", key: str):
+        self.key = key
+        self._store = store
+        weakref.finalize(self, store._release, key)
+
+    def get(self) -> Analysis:
+        return self._store.get(self.key)
+
+
+class AnalysisStore:
+    """Analyses shared by every session in the process, keyed by dataset fingerprint.
+
+    Sessions hold an AnalysisHandle, not the data, so two analysts on the same upload
+    share one copy. Resident analyses are kept within max_bytes: the least recently used
+    unreferenced ones are dropped first; if referenced ones still don't fit they are
+    pickled whole to spill_dir and unpickled on their next get() — indexes included, so
+    nothing is rebuilt — then passed to attach(analysis), if given, to reconnect what
+    pickling leaves out (the semantic search's embedder). The most recently used
+    analysis always stays resident.
+    """
+
+    def __init__(self, attach=None, max_bytes: int = ANALYSIS_MEMORY, spill_dir=SPILL_DIR):
+        self.attach    = attach
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self._resident = OrderedDict()    # key → Analysis, least recently used first
+        self._spilled  = set()
+        self._refs     = Counter()
+        self._lock     = threading.RLock()
+
+    def put(self, key: str, analysis: Analysis) -> AnalysisHandle:
+        with self._lock:
+            self._resident[key] = analysis
+            self._resident.move_to_end(key)
+            self._spilled.discard(key)
+            handle = self._acquire(key)
+            self._evict()
+        return handle
+
+    def open(self, key: str) -> Optional[AnalysisHandle]:
+        """A new handle on key, or None if the store doesn't hold it."""
+        with self._lock:
+            if key not in self._resident and key not in self._spilled:
+                return None
+            return self._acquire(key)
+
+    def get(self, key: str) -> Analysis:
+        with self._lock:
+            if key in self._resident:
+                self._resident.move_to_end(key)
+                return self._resident[key]
+            if key not in self._spilled:
+                raise KeyError(key)
+            analysis = pd.read_pickle(self._spill_path(key))
+            if self.attach is not None:
+                self.attach(analysis)
+            self._spilled.discard(key)
+            self._spill_path(key).unlink(missing_ok=True)
+            self._resident[key] = analysis
+            self._evict()
+            return analysis
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self._resident.values())
+
+    def __len__(self) -> int:
+        return len(self._resident) + len(self._spilled)
+
+    def _acquire(self, key: str) -> AnalysisHandle:
+        self._refs[key] += 1
+        return AnalysisHandle(self, key)
+
+    def _release(self, key: str):
+        with self._lock:
+            self._refs[key] -= 1
+            if self._refs[key] <= 0:
+                del self._refs[key]
+                if key in self._spilled:
+                    self._spilled.discard(key)
+                    self._spill_path(key).unlink(missing_ok=True)
+                self._evict()
+
+    def _evict(self):
+        total = self.nbytes
+        for spill in (False, True):
+            if spill and self.spill_dir is None:
+                return
+            for key in list(self._resident)[:-1]:
+                if total <= self.max_bytes:
+                    return
+                if (key in self._refs) != spill:
+                    continue
+                analysis = self._resident.pop(key)
+                total -= analysis.nbytes
+                if spill:
+                    self.spill_dir.mkdir(parents=True, exist_ok=True)
+                    pd.to_pickle(analysis, self._spill_path(key))
+                    self._spilled.add(key)
+
+    def _spill_path(self, key: str) -> Path:
+        return self.spill_dir / f"{key}.pkl"
@@ -0,0 +1,245 @@
+"""Topic summarization — extractive (MMR over TF-IDF) and BART (facebook/bart-large-cnn)."""
+
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from cache import ResultCache
+from pipeline import _SPAWN, clean_text, group_rows
+
+SUMMARY_MODEL   = "facebook/bart-large-cnn"
+SUMMARY_DIR     = Path(os.environ.get("REVIEW_SUMMARY_DIR", Path(__file__).parent / ".cache" / "summaries"))
+TOPIC_REVIEWS   = 20       # reviews fed to the model per topic
+MAX_INPUT_CHARS = 3_000    # combined review text per topic before tokenization
+TOPIC_BATCH     = 4        # topics per generate() call
+
+SUMMARY_SENTENCES = 3      # sentences per extractive summary
+CANDIDATE_REVIEWS = 50     # most central reviews per topic whose sentences are candidates
+MMR_LAMBDA        = 0.7    # relevance vs. novelty trade-off
+SUMMARY_CHARS     = 600
+
+_TAG      = re.compile(r"<.*?>")
+_URL      = re.compile(r"http\S+")
+_SPACES   = re.compile(r"\s+")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+# ── EXTRACTIVE ────────────────────────────────────────────────────────────────
+
+def split_sentences(text: str, min_words: int = 4, max_words: int = 60) -> list:
+    """Sentences of a review with tags and URLs removed, skipping fragments and run-ons."""
+    text = _SPACES.sub(" ", _URL.sub(" ", _TAG.sub(" ", str(text)))).strip()
+    return [s for s in _SENTENCE.split(text) if min_words <= s.count(" ") + 1 <= max_words]
+
+
+def mmr_select(S, center: np.ndarray, k: int = SUMMARY_SENTENCES, lam: float = MMR_LAMBDA) -> list:
+    """Maximal marginal relevance over L2-normalised sentence rows S.
+
+    Each pick maximises lam · cos(sentence, center) − (1 − lam) · max cos(sentence, picked),
+    so the summary stays on-topic without repeating itself.
+    """
+    relevance  = np.asarray(S @ center).ravel()
+    sim        = S @ S.T
+    sim        = sim.toarray() if hasattr(sim, "toarray") else np.asarray(sim)
+    redundancy = np.zeros(S.shape[0])
+    picked     = []
+    for _ in range(min(k, S.shape[0])):
+        score = lam * relevance - (1 - lam) * redundancy
+        score[picked] = -np.inf
+        best = int(np.argmax(score))
+        picked.append(best)
+        redundancy = np.maximum(redundancy, sim[best])
+    return picked
+
+
+def extractive_summaries(texts, X, vec, centers, order, offsets,
+                         n_sentences: int = SUMMARY_SENTENCES) -> list:
+    """One extractive summary per topic from the fitted TF-IDF space.
+
+    The CANDIDATE_REVIEWS reviews of each topic closest to its centroid (ranked on the
+    document matrix X already built) are split into sentences; all candidate sentences
+    go through vec.transform in one call and MMR picks n_sentences per topic.
+    """
+    from sklearn.preprocessing import normalize
+
+    texts   = np.asarray(texts, dtype=object)
+    centers = normalize(np.asarray(centers, dtype=float))
+    n       = len(offsets) - 1
+
+    sentences, bounds = [], [0]
+    for i in range(n):
+        members = order[offsets[i]:offsets[i + 1]]
+        if len(members) > CANDIDATE_REVIEWS:
+            closeness = np.asarray(X[members] @ centers[i]).ravel()
+            members   = members[np.argsort(-closeness, kind="stable")[:CANDIDATE_REVIEWS]]
+        topic_sents = list(dict.fromkeys(s for t in texts[members] for s in split_sentences(t)))
+        sentences.extend(topic_sents)
+        bounds.append(len(sentences))
+
+    if not sentences:
+        return [""] * n
+    S = normalize(vec.transform([clean_text(s) for s in sentences]))
+
+    out = []
+    for i in range(n):
+        lo, hi = bounds[i], bounds[i + 1]
+        picks  = mmr_select(S[lo:hi], centers[i], n_sentences) if hi > lo else []
+        text   = " ".join(sentences[lo + j] for j in picks)
+        out.append(text[:SUMMARY_CHARS] + "…" if len(text) > SUMMARY_CHARS else text)
+    return out
+
+
+# ── ABSTRACTIVE ───────────────────────────────────────────────────────────────
+
+def topic_input(texts, n_reviews: int = TOPIC_REVIEWS, max_chars: int = MAX_INPUT_CHARS) -> str:
+    """The text the model reads for one topic — its first n_reviews reviews, joined and cut."""
+    joined = " ".join(_SPACES.sub(" ", _TAG.sub(" ", str(t))).strip() for t in list(texts)[:n_reviews])
+    return joined[:max_chars]
+
+
+class BartSummarizer:
+    """Abstractive summaries for many topics at once.
+
+    summarize() serves inputs it has seen before from a ResultCache keyed by
+    (input text hash, model, generation params) and generates the rest batch_size topics
+    per generate() call, in length order so padding stays small. n_workers > 1 spreads
+    batches over worker processes that each load the model once; memory is bounded by
+    n_workers model copies plus one batch of activations per worker. isolate=True keeps
+    the model out of the calling process altogether (e.g. a web server): batches always
+    go to n_workers spawned workers, which stay up between calls until close().
+    """
+
+    def __init__(self, model_name: str = SUMMARY_MODEL, batch_size: int = TOPIC_BATCH,
+                 n_workers: int = 1, max_length: int = 100, min_length: int = 30,
+                 num_beams: int = 4, cache_dir=SUMMARY_DIR, isolate: bool = False):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.n_workers  = n_workers
+        self.isolate    = isolate
+        self.params     = {"max_length": max_length, "min_length": min_length, "num_beams": num_beams}
+        self.cache      = ResultCache(cache_dir) if cache_dir is not None else None
+        self._model     = None
+        self._pool      = None
+
+    def model(self):
+        if self._model is None:
+            from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            model     = AutoModelForSeq2SeqLM.from_pretrained(self.model_name).eval()
+            self._model = (tokenizer, model)
+        return self._model
+
+    def generate(self, docs: list) -> list:
+        """One batched generate() over docs — no cache."""
+        import torch
+
+        tokenizer, model = self.model()
+        inputs = tokenizer(docs, return_tensors="pt", max_length=1024, truncation=True, padding=True)
+        with torch.inference_mode():
+            ids = model.generate(**inputs, **self.params)
+        return tokenizer.batch_decode(ids, skip_special_tokens=True)
+
+    def _key(self, doc: str) -> str:
+        digest = hashlib.blake2b(doc.encode("utf-8"), digest_size=16).hexdigest()
+        return ResultCache.key(digest, self.model_name, *sorted(self.params.items()))
+
+    def summarize(self, docs: list) -> list:
+        """One summary per input doc (empty docs give "")."""
+        out     = [""] * len(docs)
+        pending = {}
+        for i, doc in enumerate(docs):
+            if not doc.strip():
+                continue
+            hit = self.cache.load(self._key(doc)) if self.cache is not None else None
+            if hit:
+                out[i] = hit["summary"]
+            else:
+                pending.setdefault(doc, []).append(i)
+
+        todo    = sorted(pending, key=len)
+        batches = [todo[i:i + self.batch_size] for i in range(0, len(todo), self.batch_size)]
+        for batch, summaries in zip(batches, self._run(batches)):
+            for doc, summary in zip(batch, summaries):
+                if self.cache is not None:
+                    self.cache.save(self._key(doc), summary=summary)
+                for i in pending[doc]:
+                    out[i] = summary
+        return out
+
+    def _run(self, batches):
+        if self.isolate:
+            if not batches:
+                return []
+            if self._pool is None:
+                self._pool = self._start_pool(self.n_workers)
+            try:
+                return list(self._pool.map(_worker_generate, batches))
+            except BrokenProcessPool:
+                self._pool = None     # a worker died (e.g. out of memory) — start afresh next call
+                raise
+        if self.n_workers <= 1 or len(batches) <= 1:
+            return (self.generate(b) for b in batches)
+        with self._start_pool(min(self.n_workers, len(batches))) as pool:
+            return list(pool.map(_worker_generate, batches))
+
+    def _start_pool(self, n_workers: int) -> ProcessPoolExecutor:
+        threads = max(1, (os.cpu_count() or 1) // n_workers)
+        return ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=_SPAWN,
+            initializer=_init_worker, initargs=(self.model_name, self.params, threads),
+        )
+
+    def close(self):
+        """Stop the isolated workers (and free their model copies)."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+_worker: Optional[BartSummarizer] = None
+_worker_args: tuple = ()
+
+
+def _init_worker(model_name: str, params: dict, threads: int):
+    global _worker_args
+    _worker_args = (model_name, params, threads)
+
+
+def _worker_generate(docs: list) -> list:
+    # The model loads on the first task, not in the initializer, so a missing package
+    # comes back as that task's ImportError instead of breaking the pool
+    global _worker
+    if _worker is None:
+        import torch
+        model_name, params, threads = _worker_args
+        torch.set_num_threads(threads)
+        _worker = BartSummarizer(model_name, cache_dir=None, **params)
+    return _worker.generate(docs)
+
+
+def summarize_topics(reviews_df: pd.DataFrame, summaries_df: pd.DataFrame, summarizer=None,
+                     text_col: str = "Text", topic_col: str = "topic") -> pd.DataFrame:
+    """summaries_df with its summary column rewritten by summarizer (default: BartSummarizer)."""
+    summarizer = summarizer or BartSummarizer()
+    topics     = reviews_df[topic_col].to_numpy()
+    ids, codes = np.unique(topics, return_inverse=True)
+    order, offsets = group_rows(codes, len(ids))
+    texts      = reviews_df[text_col].to_numpy()
+
+    docs = []
+    for tid in summaries_df["topic_id"]:
+        i = np.searchsorted(ids, tid)
+        members = order[offsets[i]:offsets[i + 1]] if i < len(ids) and ids[i] == tid else []
+        docs.append(topic_input(texts[members[:TOPIC_REVIEWS]]))
+
+    out = summaries_df.copy()
+    new = summarizer.summarize(docs)
+    out["summary"] = [s or old for s, old in zip(new, out["summary"])]
+    return out